@@ -1,11 +1,13 @@
 import os
 import sys
 from datetime import datetime
-from openai import OpenAI
 
 import argparse
-endpoint = "https://models.github.ai/inference"
-model = "openai/gpt-4.1"
+from compact_encoding import ENCODINGS, FORMAT_NOTE, encode
+from llm_backend import LLMBackend, LLMError, github_provider_from_env
+# Endpoint and model come from GITHUB_MODELS_ENDPOINT / GITHUB_MODELS_MODEL
+# (default https://models.github.ai/inference, openai/gpt-4.1); point the
+# endpoint at llm_standin.py for offline runs.
 
 system_message = """You are a helpful AI assistant that summarises a price list file of new Azure AI Foundry Model meters, and provides a concise overview of the file. The file is provided in ndjson format, and all the prices are in USD. Stick to the facts. Do not include a title or preamble. When there are multiple prices for the same model, don't quote the rage, just state from $xxxxx. At the end of the document, state that prices vary depending on region.
 When summarising, group the models by model provider (using heading level 3), and try to summarise one model per bullet point. Do not round up or round down pricing.
@@ -17,6 +19,7 @@ Treat these models are different: o3-mini, o3, o3-pro."""
 def main():
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("--date", dest="date", type=str, help="Date in YYYY-MM-DD format")
+    parser.add_argument("--encoding", dest="encoding", choices=ENCODINGS, default=os.getenv("AI_SUMMARY_ENCODING", "ndjson"), help="How price records are sent to the model")
     # Don't let argparse print its own usage; we provide a friendlier tip per requirements.
     args, unknown = parser.parse_known_args()
 
@@ -36,7 +39,7 @@ def main():
     # Resolve paths relative to this script's directory
     base_dir = os.path.dirname(os.path.abspath(__file__))
     input_path = os.path.join(base_dir, "monthly", "partial", f"{date_str}.ndjson")
-    output_dir = os.path.join(base_dir, "monthly", "aisummary")
+    output_dir = os.getenv("AI_SUMMARY_OUTPUT_DIR", os.path.join(base_dir, "monthly", "aisummary"))
     output_path = os.path.join(output_dir, f"{date_str}.md")
 
     if not os.path.exists(input_path):
@@ -50,45 +53,28 @@ def main():
 
     try:
         with open(input_path, "r", encoding="utf-8") as f:
-            ndjson_content = f.read()
+            ndjson_content = encode(f.read(), args.encoding)
     except Exception as e:
         print(f"Error reading input file: {e}")
         sys.exit(4)
 
     # Acquire token only when needed (after early exits above)
-    token = os.environ.get("GITHUB_TOKEN")
-    if not token:
+    provider = github_provider_from_env()
+    if provider is None:
         print("Error: GITHUB_TOKEN environment variable is not set. Set it before running.")
         sys.exit(7)
 
-    client = OpenAI(
-        base_url=endpoint,
-        api_key=token,
-    )
+    # Paced by GITHUB_MODELS_TPM / GITHUB_MODELS_RPM, with 429-aware retries and a per-request timeout
+    backend = LLMBackend([provider])
 
     try:
-        response = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_message,
-                },
-                {
-                    "role": "user",
-                    # Use the NDJSON string directly as the user content
-                    "content": ndjson_content,
-                }
-            ],
-            temperature=1,
-            top_p=1,
-            model=model
-        )
-    except Exception as e:
+        instructions = system_message + FORMAT_NOTE if args.encoding == "compact" else system_message
+        # Use the NDJSON string (or its compact form) directly as the user content
+        content = backend.complete(instructions, ndjson_content).text
+    except LLMError as e:
         print(f"Error from model API: {e}")
         sys.exit(5)
 
-    content = response.choices[0].message.content if response and response.choices else ""
-
     try:
         os.makedirs(output_dir, exist_ok=True)
         # Build a level-1 heading with the date in full format, e.g., "14 March 2025"
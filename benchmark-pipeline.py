@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark the processing stages on synthetic data at several scales.
+
+For each scale, synthetic_data.py generates a prices.ndjson-shaped file in a
+temporary directory. Each stage then runs in its own child process, so its
+peak RSS is its own, and is timed:
+
+  split        load_local_prices + group_by_effective_date + write_ndjson
+  filter       filter_ndjson_directory (full -> partial)
+  consolidate  consolidate-ai-summaries.py rendering (server mode, cold cache)
+               over one stand-in summary per synthetic date
+
+Reported per stage: wall and CPU seconds, peak RSS and throughput. Timings
+only mean something on the machine that took them, so no baseline is
+committed: --save-baseline records one locally in benchmark-baseline.json
+(git-ignored), together with the host, CPU count and Python version. Later
+runs on the same machine are compared with it. A stage regresses when its
+wall time or peak RSS exceeds the baseline by more than --threshold (default
+25%) and by more than a small absolute margin (0.25 s / 10 MB), and the
+script then exits with status 1. A baseline from another machine is shown
+for reference but never fails the run.
+
+Usage:
+  python benchmark-pipeline.py --save-baseline     # on main: record this machine's baseline
+  python benchmark-pipeline.py                     # on a branch: scales 1 and 10, compare with it
+  python benchmark-pipeline.py --scales 1,10,100 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from profiling import peak_rss_mb
+
+BASE_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BASE_DIR / "benchmark-baseline.json"
+STAGES = ("split", "filter", "consolidate")
+DEFAULT_THRESHOLD = 0.25
+# Differences below these are noise on sub-second stages, whatever the percentage
+MIN_DELTA = {"wall_seconds": 0.25, "peak_rss_mb": 10.0}
+
+
+def load_script(name: str, filename: str):
+	"""Import one of the repo's hyphenated scripts as a module."""
+	spec = importlib.util.spec_from_file_location(name, BASE_DIR / filename)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+
+def run_stage(stage: str, workdir: Path) -> dict:
+	"""Run one stage against workdir (in this process) and measure it."""
+	sys.path.insert(0, str(BASE_DIR))
+	full_dir = workdir / "monthly" / "full"
+	partial_dir = workdir / "monthly" / "partial"
+	aisummary_dir = workdir / "monthly" / "aisummary"
+
+	if stage in ("split", "filter"):
+		import split_into_monthly as split
+		target = full_dir if stage == "split" else partial_dir
+		shutil.rmtree(target, ignore_errors=True)
+	else:
+		consolidate = load_script("consolidate_ai_summaries", "consolidate-ai-summaries.py")
+
+	wall0, cpu0 = time.perf_counter(), time.process_time()
+	if stage == "split":
+		items = split.load_local_prices(str(workdir / "prices.ndjson"))
+		groups = split.group_by_effective_date(items)
+		split.write_ndjson(groups, str(full_dir))
+		count, unit = len(items), "records"
+		size = (workdir / "prices.ndjson").stat().st_size
+	elif stage == "filter":
+		with contextlib.redirect_stdout(io.StringIO()):
+			split.filter_ndjson_directory(str(full_dir), str(partial_dir), split.FILTER_KEYS)
+		files = list(full_dir.glob("*.ndjson"))
+		count = sum(sum(1 for _ in open(p, "rb")) for p in files)
+		unit = "records"
+		size = sum(p.stat().st_size for p in files)
+	else:
+		fragments, _, _ = consolidate.collect_fragments(aisummary_dir, {}, "server")
+		page = consolidate.build_page(fragments, "server")
+		(workdir / "monthly" / "index.html").write_text(page, encoding="utf-8")
+		count, unit = len(fragments), "sections"
+		size = sum(p.stat().st_size for p in aisummary_dir.glob("*.md"))
+	wall = time.perf_counter() - wall0
+	cpu = time.process_time() - cpu0
+	return {
+		"stage": stage,
+		"wall_seconds": round(wall, 3),
+		"cpu_seconds": round(cpu, 3),
+		"peak_rss_mb": peak_rss_mb(),
+		"items": count,
+		"unit": unit,
+		"items_per_sec": round(count / wall, 1) if wall > 0 else 0.0,
+		"mb_per_sec": round(size / 1e6 / wall, 2) if wall > 0 else 0.0,
+	}
+
+
+def write_standin_summaries(workdir: Path) -> int:
+	"""One summary-shaped markdown file per synthetic date, built from its partial file."""
+	sys.path.insert(0, str(BASE_DIR))
+	from llm_standin import fake_summary
+
+	aisummary_dir = workdir / "monthly" / "aisummary"
+	aisummary_dir.mkdir(parents=True, exist_ok=True)
+	count = 0
+	for path in sorted((workdir / "monthly" / "partial").glob("*.ndjson")):
+		text = path.read_text(encoding="utf-8")
+		(aisummary_dir / f"{path.stem}.md").write_text(f"# {path.stem}\n\n{fake_summary(text, 400)}\n", encoding="utf-8")
+		count += 1
+	return count
+
+
+def measure(stage: str, workdir: Path, repeat: int) -> dict:
+	"""Run a stage `repeat` times in child processes; keep the fastest run."""
+	runs = []
+	for _ in range(max(1, repeat)):
+		result = subprocess.run(
+			[sys.executable, str(Path(__file__).resolve()), "--run-stage", stage, "--workdir", str(workdir)],
+			capture_output=True,
+			text=True,
+		)
+		if result.returncode != 0:
+			raise SystemExit(f"Stage {stage} failed:\n{result.stderr}")
+		runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+	best = min(runs, key=lambda r: r["wall_seconds"])
+	best["peak_rss_mb"] = max(r["peak_rss_mb"] for r in runs)
+	return best
+
+
+def bench_scale(scale: float, repeat: int, seed: int) -> list[dict]:
+	import synthetic_data
+
+	with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+		workdir = Path(tmp)
+		profile = synthetic_data.load_profile()
+		records = round(profile.total * scale)
+		dates = synthetic_data.default_dates(profile, records)
+		count, size = synthetic_data.write_ndjson(
+			workdir / "prices.ndjson", synthetic_data.generate(profile, records, dates=dates, seed=seed)
+		)
+		print(f"Scale {scale:g}: {count:,} records over {dates} dates ({size / 1e6:.1f} MB)")
+		results = []
+		for stage in STAGES:
+			if stage == "consolidate":
+				write_standin_summaries(workdir)
+			results.append(measure(stage, workdir, repeat))
+		return results
+
+
+def machine() -> dict:
+	"""What a baseline's timings depend on; baselines only compare on a matching machine."""
+	return {"host": platform.node(), "arch": platform.machine(), "cpus": os.cpu_count(), "python": sys.version.split()[0]}
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+	try:
+		return json.loads(path.read_text(encoding="utf-8"))
+	except FileNotFoundError:
+		return {}
+
+
+def compare(results: dict[str, list[dict]], baseline: dict, threshold: float) -> list[str]:
+	"""Return a description of every stage that regressed beyond the threshold."""
+	regressions = []
+	for scale, stages in results.items():
+		base_stages = baseline.get("scales", {}).get(scale, {})
+		for r in stages:
+			base = base_stages.get(r["stage"])
+			if not base:
+				continue
+			for metric in ("wall_seconds", "peak_rss_mb"):
+				limit = max(base[metric] * (1 + threshold), base[metric] + MIN_DELTA[metric])
+				if base[metric] and r[metric] > limit:
+					change = (r[metric] / base[metric] - 1) * 100
+					regressions.append(f"scale {scale} {r['stage']}: {metric} {base[metric]} -> {r[metric]} (+{change:.0f}%)")
+	return regressions
+
+
+def print_table(results: dict[str, list[dict]], baseline: dict) -> None:
+	print(f"{'scale':>6} {'stage':<12}{'wall s':>9}{'cpu s':>9}{'rss MB':>9}{'items/s':>12}{'MB/s':>8}{'vs base':>9}")
+	for scale, stages in results.items():
+		base_stages = baseline.get("scales", {}).get(scale, {})
+		for r in stages:
+			base = base_stages.get(r["stage"])
+			delta = f"{(r['wall_seconds'] / base['wall_seconds'] - 1) * 100:+.0f}%" if base and base["wall_seconds"] else "-"
+			print(
+				f"{scale:>6} {r['stage']:<12}{r['wall_seconds']:>9.2f}{r['cpu_seconds']:>9.2f}{r['peak_rss_mb']:>9.1f}"
+				f"{r['items_per_sec']:>12,.0f}{r['mb_per_sec']:>8.1f}{delta:>9}"
+			)
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description="Benchmark split, filter and consolidate on synthetic data.")
+	parser.add_argument("--scales", default="1,10", help="Comma-separated multiples of today's data size (default 1,10)")
+	parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept (default 1)")
+	parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data (default 0)")
+	parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown / memory growth before failing (default 0.25)")
+	parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline file (default benchmark-baseline.json)")
+	parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline for the scales run")
+	parser.add_argument("--json", dest="json_out", help="Also write the results to this JSON file")
+	parser.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+	parser.add_argument("--workdir", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.run_stage:
+		print(json.dumps(run_stage(args.run_stage, Path(args.workdir))))
+		return 0
+
+	sys.path.insert(0, str(BASE_DIR))
+	baseline_path = Path(args.baseline)
+	baseline = load_baseline(baseline_path)
+	results = {
+		f"{scale:g}": bench_scale(scale, args.repeat, args.seed)
+		for scale in (float(s) for s in args.scales.split(",") if s.strip())
+	}
+	print_table(results, baseline)
+
+	if args.json_out:
+		Path(args.json_out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+	if args.save_baseline:
+		# Only keep scales recorded on this machine; another machine's timings would skew later checks
+		scales = baseline.get("scales", {}) if baseline.get("machine") == machine() else {}
+		for scale, stages in results.items():
+			scales[scale] = {r["stage"]: {k: r[k] for k in ("wall_seconds", "cpu_seconds", "peak_rss_mb", "items_per_sec")} for r in stages}
+		data = {"seed": args.seed, "machine": machine(), "scales": scales}
+		baseline_path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+		print(f"Saved baseline to {baseline_path}")
+		return 0
+
+	if not baseline:
+		print(f"No baseline at {baseline_path}; run with --save-baseline to record one.")
+		return 0
+	if baseline.get("machine") != machine():
+		print(f"{baseline_path} was recorded on another machine ({baseline.get('machine')}); not checking for regressions.")
+		print("Run with --save-baseline here to compare future runs.")
+		return 0
+	regressions = compare(results, baseline, args.threshold)
+	if regressions:
+		print(f"Regressions beyond {args.threshold:.0%}:")
+		for line in regressions:
+			print(f"  {line}")
+		return 1
+	print(f"No regressions beyond {args.threshold:.0%}.")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the summary stage against the offline stand-in server.
+
+Starts llm_standin.py in-process, points create-ai-summaries.py at it through
+the usual AZURE_OPENAI_* settings, and runs a --force rebuild of every date in
+monthly/partial once per concurrency level. Summaries and the cache are written
+to a temporary directory, so the real archive is never touched.
+
+Reports dates/min, per-date latency percentiles (as seen by
+create-ai-summaries.py) and retry overhead (throttled or hung requests per
+completed request, and the server-side seconds spent on them; client
+backoff between retries shows up in the per-date latency instead).
+
+Usage:
+  python benchmark-summaries.py --concurrency 1,4,8 --latency 1 --tokens-per-second 100
+  python benchmark-summaries.py --rate-429 0.2 --retry-after 0.5 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from llm_standin import StandinConfig, start_server
+
+DATE_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2}): generated in ([0-9.]+)s$", re.M)
+
+
+def percentile(values: list[float], pct: float) -> float:
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+	return ordered[index]
+
+
+def run_once(base_dir: Path, port: int, concurrency: int, encoding: str, extra_args: list[str]) -> tuple[float, str, int]:
+	"""Run one forced rebuild; return (wall seconds, stdout, exit code)."""
+	with tempfile.TemporaryDirectory(prefix="summary-bench-") as tmp:
+		env = dict(os.environ)
+		env.update({
+			"AZURE_OPENAI_API_KEY": "offline",
+			"AZURE_OPENAI_V1_API_ENDPOINT": f"http://127.0.0.1:{port}/openai/v1/",
+			"AZURE_OPENAI_API_MODEL": "standin",
+			"AI_SUMMARY_OUTPUT_DIR": str(Path(tmp) / "aisummary"),
+			"AI_SUMMARY_CACHE_PATH": str(Path(tmp) / "summary-cache.json"),
+		})
+		cmd = [
+			sys.executable,
+			str(base_dir / "create-ai-summaries.py"),
+			"--force",
+			"--concurrency", str(concurrency),
+			"--encoding", encoding,
+			*extra_args,
+		]
+		t0 = time.perf_counter()
+		result = subprocess.run(cmd, cwd=str(base_dir), env=env, capture_output=True, text=True)
+		return time.perf_counter() - t0, result.stdout + result.stderr, result.returncode
+
+
+def summarise_run(concurrency: int, wall: float, output: str, exit_code: int, stats: dict) -> dict:
+	latencies = [float(m.group(2)) for m in DATE_LINE.finditer(output)]
+	failed = output.count("Error: summary failed for")
+	retried = stats["throttled"] + stats["hung"]
+	wasted = sum(t["elapsed"] for t in stats["timings"] if t["kind"] != "completed")
+	return {
+		"concurrency": concurrency,
+		"exit_code": exit_code,
+		"dates_generated": len(latencies),
+		"dates_failed": failed,
+		"wall_seconds": round(wall, 2),
+		"dates_per_min": round(len(latencies) / wall * 60, 1) if wall > 0 else 0.0,
+		"latency_p50": round(percentile(latencies, 50), 2),
+		"latency_p95": round(percentile(latencies, 95), 2),
+		"latency_p99": round(percentile(latencies, 99), 2),
+		"latency_max": round(max(latencies, default=0.0), 2),
+		"requests": stats["requests"],
+		"throttled": stats["throttled"],
+		"hung": stats["hung"],
+		"retry_overhead": round(retried / stats["completed"], 3) if stats["completed"] else 0.0,
+		"wasted_seconds": round(wasted, 2),
+	}
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description="Benchmark create-ai-summaries.py against the offline LLM stand-in.")
+	parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels to run (default 1,4,8)")
+	parser.add_argument("--encoding", default="ndjson", choices=("ndjson", "compact"))
+	parser.add_argument("--latency", type=float, default=0.5, help="Stand-in seconds before first token (default 0.5)")
+	parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Stand-in output throughput (default 200)")
+	parser.add_argument("--output-tokens", type=int, default=400, help="Stand-in reply length in tokens (default 400)")
+	parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests throttled (0-1)")
+	parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429 (default 1)")
+	parser.add_argument("--rate-timeout", type=float, default=0.0, help="Fraction of requests that hang (0-1)")
+	parser.add_argument("--hang-seconds", type=float, default=30.0, help="How long a hanging request stalls (default 30)")
+	parser.add_argument("--seed", type=int, default=1, help="Seed for the stand-in's 429/timeout dice (default 1)")
+	parser.add_argument("--json", dest="json_out", help="Also write the results to this JSON file")
+	args, extra_args = parser.parse_known_args()
+
+	base_dir = Path(__file__).resolve().parent
+	levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+	results = []
+	for level in levels:
+		# Fresh server per level so stats and the dice sequence are comparable
+		server, stats = start_server(StandinConfig(
+			latency=args.latency,
+			tokens_per_second=args.tokens_per_second,
+			output_tokens=args.output_tokens,
+			rate_429=args.rate_429,
+			retry_after=args.retry_after,
+			rate_timeout=args.rate_timeout,
+			hang_seconds=args.hang_seconds,
+			seed=args.seed,
+		))
+		try:
+			print(f"Running concurrency={level} against stand-in on port {server.server_port}...")
+			wall, output, code = run_once(base_dir, server.server_port, level, args.encoding, extra_args)
+			if code != 0 and not DATE_LINE.search(output):
+				print(output)
+			results.append(summarise_run(level, wall, output, code, stats.snapshot()))
+		finally:
+			server.shutdown()
+			server.server_close()
+
+	header = f"{'conc':>5}{'dates':>7}{'failed':>7}{'wall s':>9}{'dates/min':>11}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}{'reqs':>7}{'429':>6}{'hung':>6}{'wasted s':>10}"
+	print(header)
+	for r in results:
+		print(
+			f"{r['concurrency']:>5}{r['dates_generated']:>7}{r['dates_failed']:>7}{r['wall_seconds']:>9.1f}"
+			f"{r['dates_per_min']:>11.1f}{r['latency_p50']:>8.2f}{r['latency_p95']:>8.2f}{r['latency_p99']:>8.2f}"
+			f"{r['requests']:>7}{r['throttled']:>6}{r['hung']:>6}{r['wasted_seconds']:>10.1f}"
+		)
+
+	if args.json_out:
+		Path(args.json_out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+		print(f"Wrote {args.json_out}")
+	return 0 if all(r["exit_code"] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+	sys.exit(main())
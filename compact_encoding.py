@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Compact, token-efficient encoding of monthly/partial NDJSON for the LLM.
+
+Partial files repeat the same four keys on every line, and meter names within
+a product usually share a long prefix ("GPT 5 ...", "Commitment Tier CLU ...").
+The compact form groups records by productName and writes each group once:
+
+    [Azure OpenAI GPT5] prefix="GPT 5 " unit=1M
+    Rsng outpt Glbl 1M Tokens|10.0
+    Nano Batch Inpt DZone 1M Tokens|0.0275
+
+The group header carries the productName, the meterName prefix shared by every
+row, and the unitOfMeasure when it is the same for all rows (otherwise it is
+added as a third column). Prices are copied exactly as they appear in the
+NDJSON.
+
+Usage:
+  python compact_encoding.py --report      # token counts, raw vs compact, per date
+  python compact_encoding.py --date 2025-08-01  # print the compact form of one date
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+ENCODINGS = ("ndjson", "compact")
+
+# Appended to the system message when the compact form is sent instead of NDJSON
+FORMAT_NOTE = """
+The price list is provided in a compact table format instead of ndjson. Each group starts with a header line
+[productName] prefix="..." unit=..., followed by one row per meter: meterSuffix|unitPrice (or meterSuffix|unitPrice|unitOfMeasure
+when the header has no unit). The full meter name is the prefix followed by the meterSuffix. A literal | inside a value is written as \\|.
+"""
+
+
+def _escape(value: str) -> str:
+    return value.replace("|", "\\|")
+
+
+def _shared_prefix(names: List[str]) -> str:
+    """Longest common prefix of names that ends on a word boundary."""
+    if len(names) < 2:
+        return ""
+    prefix = os.path.commonprefix(names)
+    # Cut back to the last space so no row starts mid-word or is left empty
+    return prefix[: prefix.rfind(" ") + 1]
+
+
+def _price(value) -> str:
+    return json.dumps(value) if not isinstance(value, str) else value
+
+
+def encode_compact(ndjson_content: str) -> str:
+    """Return the compact table form of an NDJSON partial file.
+
+    Lines that are not JSON objects are skipped, matching how
+    split_into_monthly.filter_ndjson_directory treats them.
+    """
+    groups: Dict[str, List[dict]] = {}
+    for line in ndjson_content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(obj, dict):
+            groups.setdefault(str(obj.get("productName") or ""), []).append(obj)
+
+    out: List[str] = []
+    for product, records in sorted(groups.items()):
+        names = [str(r.get("meterName") or "") for r in records]
+        prefix = _shared_prefix(names)
+        units = {str(r.get("unitOfMeasure") or "") for r in records}
+        header = f"[{product}]"
+        if prefix:
+            header += f' prefix="{prefix}"'
+        if len(units) == 1:
+            header += f" unit={next(iter(units))}"
+        out.append(header)
+        for name, record in sorted(zip(names, records), key=lambda nr: nr[0]):
+            row = [_escape(name[len(prefix):]), _escape(_price(record.get("unitPrice")))]
+            if len(units) > 1:
+                row.append(_escape(str(record.get("unitOfMeasure") or "")))
+            out.append("|".join(row))
+    return "\n".join(out) + "\n" if out else ""
+
+
+def encode(ndjson_content: str, encoding: str = "ndjson") -> str:
+    """Return the content to send to the model for the selected encoding."""
+    if encoding == "compact":
+        return encode_compact(ndjson_content)
+    if encoding == "ndjson":
+        return ndjson_content
+    raise ValueError(f"Unknown encoding {encoding!r}; expected one of {', '.join(ENCODINGS)}")
+
+
+def report(partial_dir: str) -> int:
+    """Print raw vs compact token counts for every partial file."""
+    from summarizer import estimate_tokens
+
+    files = sorted(f for f in os.listdir(partial_dir) if f.endswith(".ndjson"))
+    if not files:
+        print(f"No .ndjson files found in {partial_dir}")
+        return 1
+
+    total_raw = total_compact = 0
+    print(f"{'date':<12}{'ndjson':>10}{'compact':>10}{'saved':>8}")
+    for filename in files:
+        with open(os.path.join(partial_dir, filename), "r", encoding="utf-8") as f:
+            raw = f.read()
+        raw_tokens = estimate_tokens(raw)
+        compact_tokens = estimate_tokens(encode_compact(raw))
+        total_raw += raw_tokens
+        total_compact += compact_tokens
+        saved = 1 - compact_tokens / raw_tokens if raw_tokens else 0
+        print(f"{filename[:-7]:<12}{raw_tokens:>10,}{compact_tokens:>10,}{saved:>8.0%}")
+    saved = 1 - total_compact / total_raw if total_raw else 0
+    print(f"{'total':<12}{total_raw:>10,}{total_compact:>10,}{saved:>8.0%}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compact encoding of monthly/partial NDJSON for LLM input")
+    parser.add_argument("--report", action="store_true", help="Compare token counts of raw NDJSON and compact form per date")
+    parser.add_argument("--date", help="Print the compact form of monthly/partial/<date>.ndjson")
+    parser.add_argument(
+        "--partial-dir",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "monthly", "partial"),
+        help="Directory of partial NDJSON files (default: ./monthly/partial)",
+    )
+    args = parser.parse_args()
+
+    if args.date:
+        with open(os.path.join(args.partial_dir, f"{args.date}.ndjson"), "r", encoding="utf-8") as f:
+            sys.stdout.write(encode_compact(f.read()))
+        return 0
+    return report(args.partial_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
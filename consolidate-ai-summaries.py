@@ -3,16 +3,38 @@
 Consolidate all Markdown summaries in monthly/aisummary into monthly/index.html.
 
 Output HTML includes an H1 title: "Model Meter Monthly summaries" and a TOC.
-Markdown is rendered client-side via marked.js to avoid Python deps.
+
+--render selects where the markdown is turned into HTML:
+  client  (default) raw markdown is embedded and rendered by marked.js from a CDN
+  server  rendered at build time by markdown_render.py; no marked.js on the page
+  lazy    like server, but only the newest section is inlined in full; the others
+          ship just their heading and fetch monthly/sections/<id>.html on expand,
+          so the initial page stays the same size as the archive grows
+
+Runs are incremental: each section's rendered fragment is cached in
+monthly/.consolidate-cache.json keyed on the .md file's content hash (with its
+size and mtime as a fast pre-check). Only new or changed files are read and
+rendered, and index.html is rewritten atomically only when its content changes.
 """
 
 from __future__ import annotations
 
+import hashlib
 import html
+import json
+import argparse
 from pathlib import Path
-from datetime import datetime
+
+from fileutil import write_if_changed
+from markdown_render import render_markdown
+from profiling import add_profile_argument, profiler_from_args
 
 TITLE = "Model Meter Monthly summaries - ✨ AI generated"
+CACHE_FILE = ".consolidate-cache.json"
+# Bump whenever render_fragment()/render_parts() output changes so stale fragments are discarded
+CACHE_VERSION = 2
+RENDER_MODES = ("client", "server", "lazy")
+SECTIONS_DIR = "sections"
 
 
 def read_markdown_files(aisummary_dir: Path) -> list[tuple[str, str]]:
@@ -22,40 +44,153 @@ def read_markdown_files(aisummary_dir: Path) -> list[tuple[str, str]]:
 		key=lambda p: p.stem,
 		reverse=True,
 	)
-	result: list[tuple[str, str]] = []
-	for p in files:
-		try:
-			text = p.read_text(encoding="utf-8")
-		except UnicodeDecodeError:
-			text = p.read_text(errors="replace")
-		result.append((p.stem, text))
-	return result
-def build_html(sections: list[tuple[str, str]]) -> str:
-	"""Build a single HTML document string styled like the main explorer page."""
-	# Escape content for safe embedding inside <script type="text/markdown">.
-	section_html: list[str] = []
-	for idx, (sid, md) in enumerate(sections):
-		# Build human-friendly date label from YYYY-MM-DD, safe on Windows (no %-d)
-		try:
-			dt = datetime.strptime(sid, "%Y-%m-%d")
-			label = f"{dt.day} {dt.strftime('%B %Y')}"  # e.g., 15 March 2016
-		except Exception:
-			label = sid
-		# Use textContent via script tag to keep raw markdown; minimal escaping
-		escaped_md = md.replace("</script>", "</scr" + "ipt>")
-		is_first = idx == 0
-		collapsed_cls = "" if is_first else " collapsed"
-		section_html.append(
-			f"""
+	return [(p.stem, _read_text(p)) for p in files]
+
+
+def _read_text(p: Path) -> str:
+	try:
+		return p.read_text(encoding="utf-8")
+	except UnicodeDecodeError:
+		return p.read_text(errors="replace")
+
+
+CLIENT_RENDER_SCRIPT = """<script>
+		// Render markdown into each article section using marked.js
+		document.querySelectorAll('div.markdown-body > script[type="text/markdown"]').forEach((script) => {
+			const container = script.parentElement;
+			const raw = script.textContent || '';
+			const html = marked.parse(raw, { breaks: true, mangle: false, headerIds: true });
+			container.innerHTML = html;
+		});
+	</script>
+"""
+
+
+def render_fragment(md: str) -> str:
+	"""Render one section body (everything inside <div class="month-content">)."""
+	# Use textContent via script tag to keep raw markdown; minimal escaping
+	escaped_md = md.replace("</script>", "</scr" + "ipt>")
+	return f"""<div class=\"markdown-body\">
+						<script type=\"text/markdown\">{escaped_md}</script>
+					</div>"""
+
+
+def render_parts(md: str) -> dict[str, str]:
+	"""Pre-render a section as {"heading": first heading HTML, "details": everything after it}."""
+	lines = md.splitlines()
+	idx = next((i for i, line in enumerate(lines) if line.lstrip().startswith("#")), None)
+	if idx is None:
+		return {"heading": "", "details": render_markdown(md)}
+	return {
+		"heading": render_markdown(lines[idx]),
+		"details": render_markdown("\n".join(lines[:idx] + lines[idx + 1:])),
+	}
+
+
+def section_fragment(sid: str, entry: dict, mode: str, inline: bool) -> str:
+	"""Build the markdown-body fragment for a section from its cache entry."""
+	if mode == "client":
+		return entry["fragment"]
+	if mode == "lazy" and not inline:
+		src = html.escape(f"{SECTIONS_DIR}/{sid}.html")
+		return f'<div class="markdown-body" data-src="{src}">{entry["heading"]}</div>'
+	return f'<div class="markdown-body">{entry["heading"]}{entry["details"]}</div>'
+
+
+def wrap_article(sid: str, fragment: str, collapsed: bool) -> str:
+	collapsed_cls = " collapsed" if collapsed else ""
+	return f"""
 			<article id="{html.escape(sid)}" class="article{collapsed_cls}">
 				<div class="month-content">
-					<div class=\"markdown-body\">
-						<script type=\"text/markdown\">{escaped_md}</script>
-					</div>
+					{fragment}
 				</div>
 			</article>
 			"""
-		)
+
+
+def load_fragment_cache(path: Path, mode: str) -> dict[str, dict]:
+	try:
+		data = json.loads(path.read_text(encoding="utf-8"))
+	except (OSError, json.JSONDecodeError):
+		return {}
+	if not isinstance(data, dict) or data.get("version") != CACHE_VERSION or data.get("mode") != mode:
+		return {}
+	return data.get("sections", {})
+
+
+def save_fragment_cache(path: Path, mode: str, sections: dict[str, dict]) -> None:
+	payload = {"version": CACHE_VERSION, "mode": mode, "sections": sections}
+	write_if_changed(path, json.dumps(payload, ensure_ascii=False))
+
+
+def collect_fragments(
+	aisummary_dir: Path,
+	cache: dict[str, dict],
+	mode: str = "client",
+) -> tuple[list[tuple[str, dict]], dict[str, dict], int]:
+	"""Return ([(id, cache entry)] newest-first, updated cache, number of sections rendered).
+
+	Files whose size and mtime match the cache are not read at all; files that
+	were touched but whose content hash is unchanged reuse their fragment.
+	"""
+	files = sorted(
+		(p for p in aisummary_dir.glob("*.md") if p.is_file()),
+		key=lambda p: p.stem,
+		reverse=True,
+	)
+	fragments: list[tuple[str, dict]] = []
+	new_cache: dict[str, dict] = {}
+	rendered = 0
+	for p in files:
+		st = p.stat()
+		entry = cache.get(p.stem)
+		if not entry or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+			md = _read_text(p)
+			digest = hashlib.sha256(md.encode("utf-8")).hexdigest()
+			if not entry or entry.get("hash") != digest:
+				rendered_parts = {"fragment": render_fragment(md)} if mode == "client" else render_parts(md)
+				entry = {"hash": digest, **rendered_parts}
+				rendered += 1
+			entry = {**entry, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+		new_cache[p.stem] = entry
+		fragments.append((p.stem, entry))
+	return fragments, new_cache, rendered
+
+
+def write_section_files(sections_dir: Path, fragments: list[tuple[str, dict]]) -> int:
+	"""Write sections/<id>.html for lazy mode and prune files for removed sections."""
+	sections_dir.mkdir(parents=True, exist_ok=True)
+	written = sum(
+		write_if_changed(sections_dir / f"{sid}.html", entry["details"])
+		for sid, entry in fragments
+	)
+	keep = {f"{sid}.html" for sid, _ in fragments}
+	for p in sections_dir.glob("*.html"):
+		if p.name not in keep:
+			p.unlink()
+	return written
+
+
+def build_html(sections: list[tuple[str, str]], mode: str = "client") -> str:
+	"""Build a single HTML document string styled like the main explorer page."""
+	entries = [
+		(sid, {"fragment": render_fragment(md)} if mode == "client" else render_parts(md))
+		for sid, md in sections
+	]
+	return build_page(entries, mode)
+
+
+def build_page(fragments: list[tuple[str, dict]], mode: str = "client") -> str:
+	"""Assemble the page from pre-rendered (id, cache entry) pairs, newest first."""
+	section_html = [
+		wrap_article(sid, section_fragment(sid, entry, mode, inline=idx == 0), collapsed=idx != 0)
+		for idx, (sid, entry) in enumerate(fragments)
+	]
+	# Only the client-side mode needs marked.js on the page
+	marked_script = (
+		'<script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>' if mode == "client" else ""
+	)
+	render_script = CLIENT_RENDER_SCRIPT if mode == "client" else ""
 
 	# HTML template using the same tokens and overall look as index.html
 	html_doc = f"""<!DOCTYPE html>
@@ -107,7 +242,7 @@ def build_html(sections: list[tuple[str, str]]) -> str:
 		.footer {{ color: var(--muted); text-align:center; padding: 12px 16px; border-top:1px solid var(--border); }}
 		@media (max-width: 900px) {{ .content {{ grid-template-columns: 1fr; }} }}
 	</style>
-	<script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
+	{marked_script}
 	<style>
 		/* Prevent mobile text inflation */
 		html {{ -webkit-text-size-adjust: 100%; text-size-adjust: 100%; }}
@@ -182,15 +317,7 @@ def build_html(sections: list[tuple[str, str]]) -> str:
 		}})();
 	</script>
 
-	<script>
-		// Render markdown into each article section using marked.js
-		document.querySelectorAll('div.markdown-body > script[type="text/markdown"]').forEach((script) => {{
-			const container = script.parentElement;
-			const raw = script.textContent || '';
-			const html = marked.parse(raw, {{ breaks: true, mangle: false, headerIds: true }});
-			container.innerHTML = html;
-		}});
-	</script>
+	{render_script}
 
 	<script>
 		// Collapsible behavior: use the first heading inside each markdown section as the toggle.
@@ -228,9 +355,23 @@ def build_html(sections: list[tuple[str, str]]) -> str:
 				return {{ heading, details }};
 			}}
 
+			// Lazy mode: fetch a section's pre-rendered details the first time it is expanded
+			function loadDetails(article, details){{
+				const body = article.querySelector('.markdown-body');
+				const src = body && body.dataset.src;
+				if (!src || !details || body.dataset.loaded) return;
+				body.dataset.loaded = 'loading';
+				details.innerHTML = '<p>Loading…</p>';
+				fetch(src)
+					.then(res => {{ if (!res.ok) throw new Error(res.status); return res.text(); }})
+					.then(text => {{ details.innerHTML = text; body.dataset.loaded = 'true'; }})
+					.catch(() => {{ details.innerHTML = '<p>Could not load this summary.</p>'; delete body.dataset.loaded; }});
+			}}
+
 			function setExpanded(article, expanded){{
-				const {{ heading }} = ensureDetailsWrapper(article);
+				const {{ heading, details }} = ensureDetailsWrapper(article);
 				if (expanded) {{
+					loadDetails(article, details);
 					article.classList.remove('collapsed');
 					heading?.setAttribute('aria-expanded','true');
 				}} else {{
@@ -269,21 +410,42 @@ def build_html(sections: list[tuple[str, str]]) -> str:
 	return html_doc
 
 
-def main() -> int:
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(description="Consolidate monthly/aisummary/*.md into monthly/index.html")
+	parser.add_argument(
+		"--render",
+		choices=RENDER_MODES,
+		default="client",
+		help="client: marked.js in the browser (default); server: pre-rendered HTML; lazy: pre-rendered, collapsed sections fetched on expand",
+	)
+	add_profile_argument(parser)
+	args = parser.parse_args(argv)
+
 	repo_root = Path(__file__).resolve().parent
 	monthly_dir = repo_root / "monthly"
 	aisummary_dir = monthly_dir / "aisummary"
 	if not aisummary_dir.exists():
 		raise SystemExit(f"Directory not found: {aisummary_dir}")
 
-	sections = read_markdown_files(aisummary_dir)
-	if not sections:
-		raise SystemExit("No markdown files found in monthly/aisummary")
+	cache_path = monthly_dir / CACHE_FILE
+	with profiler_from_args("consolidate-ai-summaries", args) as profiler:
+		with profiler.phase("render"):
+			fragments, cache, rendered = collect_fragments(aisummary_dir, load_fragment_cache(cache_path, args.render), args.render)
+		if not fragments:
+			raise SystemExit("No markdown files found in monthly/aisummary")
+
+		with profiler.phase("build"):
+			html_text = build_page(fragments, args.render)
 
-	html_text = build_html(sections)
-	out_file = monthly_dir / "index.html"
-	out_file.write_text(html_text, encoding="utf-8")
-	print(f"Wrote {out_file} with {len(sections)} sections.")
+		with profiler.phase("write"):
+			if args.render == "lazy":
+				written = write_section_files(monthly_dir / SECTIONS_DIR, fragments)
+				print(f"Wrote {written} changed section fragments to {monthly_dir / SECTIONS_DIR}.")
+			out_file = monthly_dir / "index.html"
+			changed = write_if_changed(out_file, html_text)
+			save_fragment_cache(cache_path, args.render, cache)
+	status = "Wrote" if changed else "Unchanged"
+	print(f"{status} {out_file} with {len(fragments)} sections ({rendered} rendered, {len(fragments) - rendered} from cache).")
 	return 0
 
 
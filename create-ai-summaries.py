@@ -2,74 +2,253 @@
 import os
 import sys
 import glob
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import argparse
 
+from dotenv import load_dotenv
+
+from compact_encoding import ENCODINGS, encode
+from profiling import Profiler, add_profile_argument, profiler_from_args
+from summarizer import (
+	AISUMMARY_DIR,
+	DEFAULT_CHUNK_TOKENS,
+	DEFAULT_ENCODING,
+	SummaryError,
+	SummaryResult,
+	configured_model,
+	configured_tools,
+	create_backend,
+	entry_for_date,
+	estimate_tokens,
+	generate_summary,
+	instructions_for,
+	load_cache,
+	output_path_for,
+	read_input,
+	save_cache,
+	stale_reason,
+	system_message,
+)
+
+
+DEFAULT_CONCURRENCY = 4
+
+
+def summarize_one(
+	stem: str,
+	*,
+	backend,
+	force: bool,
+	cache: dict[str, dict],
+	chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+	encoding: str = DEFAULT_ENCODING,
+) -> SummaryResult:
+	"""Run one date, converting failures into a "failed" result instead of raising."""
+	t0 = time.perf_counter()
+	try:
+		return generate_summary(
+			stem,
+			backend=backend,
+			force=force,
+			cache=cache,
+			chunk_tokens=chunk_tokens,
+			encoding=encoding,
+		)
+	except SummaryError as e:
+		return SummaryResult(
+			date=stem,
+			status="failed",
+			output_path=output_path_for(stem),
+			elapsed=time.perf_counter() - t0,
+			error=str(e),
+			exit_code=e.exit_code,
+		)
+
+
+def run_batch(
+	dates: list[str],
+	*,
+	backend,
+	force: bool,
+	concurrency: int,
+	cache: dict[str, dict],
+	chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+	encoding: str = DEFAULT_ENCODING,
+) -> list[SummaryResult]:
+	"""Summarise dates on a bounded thread pool sharing a single LLM backend.
+
+	The cache is saved as each date completes, so an interrupted batch keeps
+	the work it already paid for. Results are returned in the order of `dates`,
+	whatever order they finish in.
+	"""
+	results: dict[str, SummaryResult] = {}
+	with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+		futures = {
+			pool.submit(
+				summarize_one,
+				stem,
+				backend=backend,
+				force=force,
+				cache=cache,
+				chunk_tokens=chunk_tokens,
+				encoding=encoding,
+			): stem
+			for stem in dates
+		}
+		for future in as_completed(futures):
+			result = future.result()
+			results[result.date] = result
+			if result.cache_entry is not None:
+				cache[result.date] = result.cache_entry
+				save_cache(cache)
+			if result.status == "failed":
+				print(f"Error: summary failed for {result.date} (exit code {result.exit_code}): {result.error}")
+			else:
+				print(f"{result.date}: {result.status} in {result.elapsed:.1f}s")
+	return [results[stem] for stem in dates]
+
+
+def print_dry_run(stale: dict[str, str], aisummary_dir: Path, encoding: str = DEFAULT_ENCODING) -> None:
+	"""List stale dates and estimate the tokens regenerating them would cost."""
+	existing = [p.read_text(encoding="utf-8") for p in aisummary_dir.glob("*.md")]
+	# Expected output size per summary, based on the summaries we already have
+	avg_output = sum(estimate_tokens(text) for text in existing) // len(existing) if existing else 0
+	prompt_tokens = estimate_tokens(instructions_for(system_message, encoding))
+	total_input = 0
+	for stem, reason in stale.items():
+		input_tokens = prompt_tokens + estimate_tokens(encode(read_input(stem), encoding))
+		total_input += input_tokens
+		print(f"  {stem}: {reason} (~{input_tokens:,} input tokens)")
+	total_output = avg_output * len(stale)
+	print(
+		f"Dry run: {len(stale)} stale dates. Estimated ~{total_input:,} input + ~{total_output:,} output tokens "
+		"(excluding MCP tool calls)."
+	)
+
 
 def main() -> int:
 	# Parse CLI args
 	parser = argparse.ArgumentParser(add_help=True)
-	parser.add_argument("--force", action="store_true", help="Overwrite existing summaries if present")
+	parser.add_argument("--force", action="store_true", help="Regenerate every summary, even if the cache says it is up to date")
+	parser.add_argument(
+		"--dry-run",
+		action="store_true",
+		help="List stale dates and estimate the token cost of regenerating them, without calling the model",
+	)
+	parser.add_argument(
+		"--concurrency",
+		type=int,
+		default=int(os.getenv("AI_SUMMARY_CONCURRENCY", DEFAULT_CONCURRENCY)),
+		help=f"Maximum number of dates summarised at once (default {DEFAULT_CONCURRENCY}, or $AI_SUMMARY_CONCURRENCY)",
+	)
+	parser.add_argument(
+		"--chunk-tokens",
+		type=int,
+		default=DEFAULT_CHUNK_TOKENS,
+		help=f"Split partial files above this many input tokens into map-reduce chunks (default {DEFAULT_CHUNK_TOKENS}, or $AI_SUMMARY_CHUNK_TOKENS)",
+	)
+	parser.add_argument(
+		"--encoding",
+		choices=ENCODINGS,
+		default=DEFAULT_ENCODING,
+		help=f"How price records are sent to the model (default {DEFAULT_ENCODING}, or $AI_SUMMARY_ENCODING)",
+	)
+	parser.add_argument(
+		"--dates",
+		help="Comma-separated YYYY-MM-DD dates to consider instead of every partial file (e.g. the dates an upstream step changed)",
+	)
+	add_profile_argument(parser)
 	args = parser.parse_args()
 
-	base_dir = Path(__file__).resolve().parent
+	with profiler_from_args("create-ai-summaries", args) as profiler:
+		return run(args, profiler)
 
-	ai_summary_script = base_dir / "ai-summary.py"
-	if not ai_summary_script.exists():
-		print(f"Error: ai-summary.py not found at {ai_summary_script}")
-		return 2
+
+def run(args: argparse.Namespace, profiler: Profiler) -> int:
+	load_dotenv()
+	base_dir = Path(__file__).resolve().parent
 
 	partial_dir = base_dir / "monthly" / "partial"
 	pattern = str(partial_dir / "*.ndjson")
 	files = sorted(glob.glob(pattern))
+	if args.dates is not None:
+		wanted = {d.strip() for d in args.dates.split(",") if d.strip()}
+		files = [fp for fp in files if Path(fp).stem in wanted]
 
 	if not files:
-		print(f"No .ndjson files found in {partial_dir}")
+		print(f"No .ndjson files found in {partial_dir}" + (" for the requested dates" if args.dates is not None else ""))
 		return 0
 
-	# Precompute which dates to generate
-	aisummary_dir = base_dir / "monthly" / "aisummary"
+	# Precompute which dates to generate from the content-addressed cache
+	aisummary_dir = Path(AISUMMARY_DIR)
 	stems_all = [Path(fp).stem for fp in files]
-
-	if args.force:
-		dates_to_generate = stems_all
-	else:
-		dates_to_generate = []
+	cache = load_cache()
+	# The model (and tool support) of the provider that will answer first, as create_backend() picks it
+	model, tools = configured_model(), configured_tools()
+	if not model:
+		print("Warning: no provider has credentials; staleness is judged against an empty model name.")
+
+	stale: dict[str, str] = {}
+	adopted = 0
+	with profiler.phase("plan"):
 		for stem in stems_all:
-			if not (aisummary_dir / f"{stem}.md").exists():
-				dates_to_generate.append(stem)
-
-	if not dates_to_generate:
-		print("Nothing to generate; all summaries already exist.")
+			entry = entry_for_date(stem, model, args.encoding, tools, args.chunk_tokens)
+			reason = stale_reason(stem, entry, cache, args.force)
+			if reason is not None:
+				stale[stem] = reason
+			elif stem not in cache:
+				# Summary predates the cache: record it so later input changes are detected
+				cache[stem] = entry
+				adopted += 1
+
+	if args.dry_run:
+		print_dry_run(stale, aisummary_dir, args.encoding)
 		return 0
 
-	processed = 0
-	for stem in dates_to_generate:
-		print(f"Processing {stem}...")
+	if adopted:
+		save_cache(cache)
+		print(f"Recorded {adopted} existing summaries in the summary cache.")
 
-		# Call the same Python interpreter to run ai-summary.py
-		cmd = [sys.executable, str(ai_summary_script), "--date", stem]
-		if args.force:
-			cmd.append("--force")
-
-		result = subprocess.run(cmd, cwd=str(base_dir))
-
-		if result.returncode != 0:
-			print(f"Error: ai-summary.py failed for {stem} with exit code {result.returncode}")
-			return result.returncode
-
-		processed += 1
-
-	if args.force:
-		skipped = 0
-	else:
-		skipped = len(files) - processed
+	dates_to_generate = list(stale)
+	if not dates_to_generate:
+		print("Nothing to generate; all summaries are up to date.")
+		return 0
 
-	print(f"Done. Generated: {processed}, Skipped (already existed): {skipped}.")
+	try:
+		backend = create_backend()
+	except SummaryError as e:
+		print(e)
+		return e.exit_code
+
+	# One backend for the whole batch so every worker shares its connection pools and rate budgets
+	print(f"Processing {len(dates_to_generate)} dates with concurrency {args.concurrency}...")
+	t0 = time.perf_counter()
+	with profiler.phase("summarize"):
+		results = run_batch(
+			dates_to_generate,
+			backend=backend,
+			force=args.force,
+			concurrency=args.concurrency,
+			cache=cache,
+			chunk_tokens=args.chunk_tokens,
+			encoding=args.encoding,
+		)
+	elapsed = time.perf_counter() - t0
+
+	processed = sum(1 for r in results if r.status == "generated")
+	failed = [r for r in results if r.status == "failed"]
+
+	skipped = len(files) - len(dates_to_generate)
+
+	print(f"Done in {elapsed:.1f}s. Generated: {processed}, Skipped (up to date): {skipped}, Failed: {len(failed)}.")
+	if failed:
+		print("Failed dates: " + ", ".join(r.date for r in failed))
+		# Surface the first failure's code so callers still see a non-zero status
+		return failed[0].exit_code
 	return 0
 
 
 if __name__ == "__main__":
 	sys.exit(main())
-
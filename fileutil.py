@@ -0,0 +1,26 @@
+"""File helpers shared by the scripts that write generated files."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+
+def write_if_changed(path: str | Path, text: str) -> bool:
+    """Atomically replace path with text unless it already holds exactly that; return True if written.
+
+    Leaving unchanged files alone keeps their mtimes, so downstream steps that
+    look at size/mtime or content hashes see only the files that really moved,
+    and a committed file that did not change produces no diff.
+    """
+    path = Path(path)
+    data = text.encode("utf-8")
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
@@ -0,0 +1,355 @@
+"""Shared, rate-limit-aware LLM backend for the summary scripts.
+
+Providers wrap one endpoint each: AzureProvider uses the Responses API (with
+MCP tools), GitHubModelsProvider uses Chat Completions (tools are dropped).
+LLMBackend sits in front of an ordered list of providers and adds:
+
+ - request pacing against per-provider tokens-per-minute and requests-per-minute
+   budgets (a token bucket shared by every thread using the backend)
+ - retries on 429 that honour Retry-After / retry-after-ms, pausing the whole
+   provider rather than just the request that was throttled
+ - exponential backoff on timeouts, connection errors and 5xx
+ - a per-request timeout
+ - failover to the next provider once one has exhausted its attempts
+
+The OpenAI SDK's own retries are disabled so the budgets above see every
+attempt. Configuration comes from the environment (see backend_from_env).
+"""
+
+from __future__ import annotations
+
+import email.utils
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+DEFAULT_TIMEOUT = float(os.getenv("AI_SUMMARY_TIMEOUT", "120"))
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("AI_SUMMARY_MAX_ATTEMPTS", "5"))
+# Tokens reserved for the reply when pacing a request against the TPM budget
+OUTPUT_TOKEN_RESERVE = 1000
+GITHUB_MODELS_ENDPOINT = "https://models.github.ai/inference"
+GITHUB_MODELS_MODEL = "openai/gpt-4.1"
+
+
+class BackendConfigError(Exception):
+    """No usable provider could be configured."""
+
+
+class LLMError(Exception):
+    """Every provider failed; the message lists the last error from each."""
+
+
+@dataclass
+class Completion:
+    text: str
+    provider: str
+    model: str
+    attempts: int
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    # Whether the tools were passed on (providers without tool support drop them)
+    used_tools: bool = False
+
+
+class RateLimiter:
+    """Token bucket over both a tokens-per-minute and a requests-per-minute budget.
+
+    Either budget may be None (unlimited). Buckets start full, so a burst of up
+    to one minute's budget goes out immediately. A request larger than the
+    whole TPM budget waits for a full bucket rather than forever.
+    """
+
+    def __init__(self, tokens_per_minute: int | None = None, requests_per_minute: int | None = None):
+        self.tpm = tokens_per_minute
+        self.rpm = requests_per_minute
+        self._tokens = float(tokens_per_minute or 0)
+        self._requests = float(requests_per_minute or 0)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+
+    def acquire(self, tokens: int) -> float:
+        """Block until the request fits both budgets; return seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    need = min(tokens, self.tpm) if self.tpm else 0
+                    token_wait = (need - self._tokens) * 60 / self.tpm if self.tpm and self._tokens < need else 0
+                    request_wait = (1 - self._requests) * 60 / self.rpm if self.rpm and self._requests < 1 else 0
+                    wait = max(token_wait, request_wait)
+                    if wait <= 0:
+                        if self.tpm:
+                            self._tokens -= tokens
+                        if self.rpm:
+                            self._requests -= 1
+                        return waited
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, tokens: int) -> None:
+        """Correct the TPM bucket once actual usage is known (positive = used more)."""
+        if self.tpm:
+            with self._lock:
+                self._tokens -= tokens
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class Provider(ABC):
+    """One endpoint + model with its own rate limiter."""
+
+    name = "provider"
+    supports_tools = True
+
+    def __init__(self, model: str, *, timeout: float = DEFAULT_TIMEOUT, limiter: RateLimiter | None = None):
+        self.model = model
+        self.timeout = timeout
+        self.limiter = limiter or RateLimiter()
+
+    @abstractmethod
+    def complete(self, instructions: str, content: str, tools: list[dict] | None) -> tuple[str, int | None, int | None]:
+        """Return (text, input_tokens, output_tokens); raise the SDK's exceptions."""
+
+
+class AzureProvider(Provider):
+    name = "azure"
+
+    def __init__(self, api_key: str, endpoint: str, model: str, **kwargs):
+        super().__init__(model, **kwargs)
+        from openai import OpenAI
+
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=endpoint,
+            default_query={"api-version": "preview"},
+            timeout=self.timeout,
+            max_retries=0,
+        )
+
+    def complete(self, instructions, content, tools):
+        kwargs = {"tools": tools} if tools else {}
+        response = self.client.responses.create(model=self.model, instructions=instructions, input=content, **kwargs)
+        usage = getattr(response, "usage", None)
+        return (
+            getattr(response, "output_text", "") or "",
+            getattr(usage, "input_tokens", None),
+            getattr(usage, "output_tokens", None),
+        )
+
+
+class GitHubModelsProvider(Provider):
+    name = "github"
+    supports_tools = False
+
+    def __init__(self, token: str, endpoint: str = GITHUB_MODELS_ENDPOINT, model: str = GITHUB_MODELS_MODEL, **kwargs):
+        super().__init__(model, **kwargs)
+        from openai import OpenAI
+
+        self.client = OpenAI(base_url=endpoint, api_key=token, timeout=self.timeout, max_retries=0)
+
+    def complete(self, instructions, content, tools):
+        # Chat Completions has no MCP tool support; the summary is produced without links
+        response = self.client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": instructions},
+                {"role": "user", "content": content},
+            ],
+            temperature=1,
+            top_p=1,
+            model=self.model,
+        )
+        usage = getattr(response, "usage", None)
+        text = response.choices[0].message.content if response and response.choices else ""
+        return (
+            text or "",
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Read retry-after-ms / Retry-After from an SDK exception's response, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code >= 500
+
+
+class LLMBackend:
+    """Paced, retrying, failing-over front end over one or more providers."""
+
+    def __init__(self, providers: list[Provider], *, max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff: float = 1.0):
+        if not providers:
+            raise BackendConfigError("At least one provider is required.")
+        self.providers = providers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+    @property
+    def model(self) -> str:
+        """Model of the primary provider; what a summary is expected to be made with."""
+        return self.providers[0].model
+
+    @property
+    def supports_tools(self) -> bool:
+        return self.providers[0].supports_tools
+
+    def complete(self, instructions: str, content: str, tools: list[dict] | None = None) -> Completion:
+        estimate = (len(instructions) + len(content)) // 4 + OUTPUT_TOKEN_RESERVE
+        errors: list[str] = []
+        for provider in self.providers:
+            for attempt in range(1, self.max_attempts + 1):
+                provider.limiter.acquire(estimate)
+                try:
+                    text, input_tokens, output_tokens = provider.complete(instructions, content, tools)
+                except Exception as e:
+                    if attempt < self.max_attempts and _is_retryable(e):
+                        delay = retry_after_seconds(e)
+                        if delay is not None:
+                            provider.limiter.pause(delay)
+                        else:
+                            time.sleep(self.backoff * 2 ** (attempt - 1))
+                        continue
+                    errors.append(f"{provider.name}: {e}")
+                    break
+                if input_tokens is not None and output_tokens is not None:
+                    provider.limiter.adjust(input_tokens + output_tokens - estimate)
+                return Completion(
+                    text, provider.name, provider.model, attempt, input_tokens, output_tokens,
+                    used_tools=bool(tools) and provider.supports_tools,
+                )
+        raise LLMError("; ".join(errors))
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def azure_settings_from_env() -> dict | None:
+    """AzureProvider's arguments from the environment; None if any credential is missing."""
+    key = os.getenv("AZURE_OPENAI_API_KEY")
+    endpoint = os.getenv("AZURE_OPENAI_V1_API_ENDPOINT")
+    model = os.getenv("AZURE_OPENAI_API_MODEL")
+    if not key or not endpoint or not model:
+        return None
+    return {"api_key": key, "endpoint": endpoint, "model": model}
+
+
+def github_settings_from_env() -> dict | None:
+    """GitHubModelsProvider's arguments from the environment; None without GITHUB_TOKEN."""
+    token = os.getenv("GITHUB_TOKEN")
+    if not token:
+        return None
+    return {
+        "token": token,
+        "endpoint": os.getenv("GITHUB_MODELS_ENDPOINT", GITHUB_MODELS_ENDPOINT),
+        "model": os.getenv("GITHUB_MODELS_MODEL", GITHUB_MODELS_MODEL),
+    }
+
+
+def azure_provider_from_env(timeout: float = DEFAULT_TIMEOUT) -> AzureProvider | None:
+    settings = azure_settings_from_env()
+    if settings is None:
+        return None
+    limiter = RateLimiter(_env_int("AZURE_OPENAI_TPM"), _env_int("AZURE_OPENAI_RPM"))
+    return AzureProvider(**settings, timeout=timeout, limiter=limiter)
+
+
+def github_provider_from_env(timeout: float = DEFAULT_TIMEOUT) -> GitHubModelsProvider | None:
+    settings = github_settings_from_env()
+    if settings is None:
+        return None
+    limiter = RateLimiter(_env_int("GITHUB_MODELS_TPM"), _env_int("GITHUB_MODELS_RPM"))
+    return GitHubModelsProvider(**settings, timeout=timeout, limiter=limiter)
+
+
+PROVIDER_FACTORIES = {
+    "azure": azure_provider_from_env,
+    "github": github_provider_from_env,
+}
+# name -> (provider class, settings reader); what the factories build, without building it
+PROVIDER_SETTINGS = {
+    "azure": (AzureProvider, azure_settings_from_env),
+    "github": (GitHubModelsProvider, github_settings_from_env),
+}
+
+
+def provider_names(order: str | None = None) -> list[str]:
+    """The failover list: `order`, else $AI_SUMMARY_PROVIDERS, else "azure"."""
+    names = [n.strip() for n in (order or os.getenv("AI_SUMMARY_PROVIDERS", "azure")).split(",") if n.strip()]
+    unknown = [n for n in names if n not in PROVIDER_FACTORIES]
+    if unknown:
+        raise BackendConfigError(f"Unknown provider(s): {', '.join(unknown)}; expected {', '.join(PROVIDER_FACTORIES)}")
+    return names
+
+
+def configured_providers(order: str | None = None) -> list[tuple[type[Provider], str]]:
+    """(provider class, model) for each provider backend_from_env would use, in order.
+
+    Applies the same credential checks without creating clients, so callers can
+    tell which model would answer without the SDK or a network connection.
+    """
+    configured = []
+    for name in provider_names(order):
+        cls, read_settings = PROVIDER_SETTINGS[name]
+        settings = read_settings()
+        if settings is not None:
+            configured.append((cls, settings["model"]))
+    return configured
+
+
+def backend_from_env(order: str | None = None, timeout: float = DEFAULT_TIMEOUT) -> LLMBackend:
+    """Build a backend from the environment.
+
+    `order` (default $AI_SUMMARY_PROVIDERS, else "azure") is a comma-separated
+    failover list, e.g. "azure,github". Providers whose credentials are missing
+    are skipped; BackendConfigError is raised if none remain.
+
+    Budgets: AZURE_OPENAI_TPM / AZURE_OPENAI_RPM and GITHUB_MODELS_TPM /
+    GITHUB_MODELS_RPM (unset = unlimited).
+    """
+    names = provider_names(order)
+    providers = [p for p in (PROVIDER_FACTORIES[n](timeout) for n in names) if p is not None]
+    if not providers:
+        raise BackendConfigError(f"No credentials found for provider(s): {', '.join(names)}")
+    return LLMBackend(providers)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Azure OpenAI and GitHub Models endpoints.
+
+Implements just enough of `POST .../responses` and `POST .../chat/completions`
+for ai-summary.py, create-ai-summaries.py and ai-summary-github-models.py to
+run without credentials. Point them at it through the usual settings:
+
+  python llm_standin.py --port 8787 --latency 1.5 --tokens-per-second 80
+  export AZURE_OPENAI_V1_API_ENDPOINT=http://127.0.0.1:8787/openai/v1/
+  export AZURE_OPENAI_API_KEY=offline AZURE_OPENAI_API_MODEL=standin
+  export GITHUB_MODELS_ENDPOINT=http://127.0.0.1:8787 GITHUB_TOKEN=offline
+
+Replies are deterministic markdown built from the request's price records,
+shaped like a real summary (per-provider H3 headings, one bullet per meter).
+Latency, output token throughput, the share of 429 responses and the share of
+requests that hang past the client timeout are all configurable. `GET /stats`
+returns request counts and per-request timings as JSON.
+
+Pure stdlib.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class StandinConfig:
+    latency: float = 0.5  # seconds before the first token
+    tokens_per_second: float = 200.0  # output throughput; 0 disables the delay
+    output_tokens: int = 400  # approximate length of each reply
+    rate_429: float = 0.0  # fraction of requests answered with 429
+    retry_after: float = 1.0  # Retry-After seconds sent with a 429
+    rate_timeout: float = 0.0  # fraction of requests that hang before replying
+    hang_seconds: float = 120.0  # how long a hanging request stalls
+    seed: int | None = None
+
+
+@dataclass
+class StandinStats:
+    requests: int = 0
+    completed: int = 0
+    throttled: int = 0
+    hung: int = 0
+    timings: list[dict] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, kind: str, path: str, elapsed: float) -> None:
+        with self.lock:
+            self.requests += 1
+            if kind == "completed":
+                self.completed += 1
+            elif kind == "throttled":
+                self.throttled += 1
+            elif kind == "hung":
+                self.hung += 1
+            self.timings.append({"kind": kind, "path": path, "elapsed": round(elapsed, 4)})
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "completed": self.completed,
+                "throttled": self.throttled,
+                "hung": self.hung,
+                "timings": list(self.timings),
+            }
+
+
+_PRICE_LINE = re.compile(r'"meterName":\s*"([^"]*)".*?"unitPrice":\s*([0-9.eE+-]+)')
+_COMPACT_ROW = re.compile(r"^([^\[|][^|]*)\|([0-9.eE+-]+)")
+
+
+def fake_summary(text: str, output_tokens: int) -> str:
+    """Build a deterministic, summary-shaped reply from the request input."""
+    meters = _PRICE_LINE.findall(text) or [m.groups() for m in map(_COMPACT_ROW.match, text.splitlines()) if m]
+    lines = ["### Stand-in Provider"]
+    for name, price in meters:
+        lines.append(f"- {name}: from ${price}")
+        # ~4 characters per token, matching summarizer.estimate_tokens' fallback
+        if sum(len(line) for line in lines) // 4 >= output_tokens:
+            break
+    while sum(len(line) for line in lines) // 4 < output_tokens:
+        lines.append("- Stand-in filler line for offline benchmarking.")
+    lines.append("")
+    lines.append("Prices vary depending on region.")
+    return "\n".join(lines)
+
+
+def _input_text(body: dict) -> str:
+    if "messages" in body:
+        return "\n".join(str(m.get("content") or "") for m in body["messages"] if m.get("role") == "user")
+    value = body.get("input", "")
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _responses_payload(body: dict, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "standin"),
+        "status": "completed",
+        "output": [
+            {
+                "id": f"msg_{uuid.uuid4().hex}",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": body.get("tools") or [],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def _chat_payload(body: dict, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "standin"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": input_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def make_handler(config: StandinConfig, stats: StandinStats):
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+            pass
+
+        def _send_json(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            path = self.path.split("?", 1)[0].rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON body"}})
+                return
+
+            if path.endswith("/responses"):
+                build = _responses_payload
+            elif path.endswith("/chat/completions"):
+                build = _chat_payload
+            else:
+                self._send_json(404, {"error": {"message": f"unsupported path {path}"}})
+                return
+
+            with rng_lock:
+                roll_429 = rng.random()
+                roll_timeout = rng.random()
+
+            if roll_429 < config.rate_429:
+                stats.record("throttled", path, time.perf_counter() - t0)
+                self._send_json(
+                    429,
+                    {"error": {"code": "429", "message": "Rate limit exceeded (stand-in)."}},
+                    {"Retry-After": f"{config.retry_after:g}", "retry-after-ms": str(int(config.retry_after * 1000))},
+                )
+                return
+
+            if roll_timeout < config.rate_timeout:
+                time.sleep(config.hang_seconds)
+                stats.record("hung", path, time.perf_counter() - t0)
+                try:
+                    self._send_json(504, {"error": {"message": "stand-in request hung"}})
+                except OSError:
+                    pass  # client gave up already
+                return
+
+            text_in = _input_text(body)
+            text = fake_summary(text_in, config.output_tokens)
+            output_tokens = max(1, len(text) // 4)
+            delay = config.latency
+            if config.tokens_per_second > 0:
+                delay += output_tokens / config.tokens_per_second
+            time.sleep(delay)
+            payload = build(body, text, max(1, len(text_in) // 4), output_tokens)
+            stats.record("completed", path, time.perf_counter() - t0)
+            self._send_json(200, payload)
+
+    return Handler
+
+
+def start_server(config: StandinConfig, host: str = "127.0.0.1", port: int = 0) -> tuple[ThreadingHTTPServer, StandinStats]:
+    """Start the stand-in on a daemon thread; port 0 picks a free port."""
+    stats = StandinStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Offline stand-in for the Azure OpenAI / GitHub Models APIs.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8787)
+    p.add_argument("--latency", type=float, default=StandinConfig.latency, help="Seconds before the first token (default 0.5)")
+    p.add_argument("--tokens-per-second", type=float, default=StandinConfig.tokens_per_second, help="Output token throughput (default 200; 0 = instant)")
+    p.add_argument("--output-tokens", type=int, default=StandinConfig.output_tokens, help="Approximate tokens per reply (default 400)")
+    p.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429 (0-1)")
+    p.add_argument("--retry-after", type=float, default=StandinConfig.retry_after, help="Retry-After seconds on 429 (default 1)")
+    p.add_argument("--rate-timeout", type=float, default=0.0, help="Fraction of requests that hang (0-1)")
+    p.add_argument("--hang-seconds", type=float, default=StandinConfig.hang_seconds, help="How long a hanging request stalls (default 120)")
+    p.add_argument("--seed", type=int, help="Seed for the 429/timeout dice, for repeatable runs")
+    return p.parse_args(argv)
+
+
+def config_from_args(args: argparse.Namespace) -> StandinConfig:
+    return StandinConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        rate_timeout=args.rate_timeout,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config_from_args(args), StandinStats()))
+    server.daemon_threads = True
+    print(f"Stand-in LLM listening on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,175 @@
+"""Minimal stdlib Markdown to HTML renderer for the AI summaries.
+
+Covers the subset the summaries use, with the same options the monthly page
+passes to marked.js (`breaks: true`, so single newlines inside a paragraph or
+list item become <br>):
+
+ - ATX headings (# to ######) and thematic breaks (---, ***, ___)
+ - paragraphs, blockquotes and fenced code blocks
+ - unordered and ordered lists, nested by indentation
+ - inline code, **bold**, *italic* / _italic_, [links](url), <autolinks>
+   and bare http(s) URLs
+
+Everything else is escaped and passed through as text, so the output is
+always safe to inline into the page.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_HR = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+_FENCE = re.compile(r"^\s*(```|~~~)\s*([\w+-]*)\s*$")
+_QUOTE = re.compile(r"^\s{0,3}>\s?(.*)$")
+
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+_LINK = re.compile(r"\[([^\]]+)\]\(\s*<?([^)\s>]+)>?(?:\s+\"([^\"]*)\")?\s*\)")
+_AUTOLINK = re.compile(r"<(https?://[^>\s]+)>")
+_BARE_URL = re.compile(r"(?<![\"'=>])\b(https?://[^\s<]+[^\s<.,:;\"')\]])")
+_BOLD = re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1")
+_ITALIC = re.compile(r"(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])")
+
+
+def _safe_url(url: str) -> str:
+    if re.match(r"^\s*(javascript|vbscript|data):", url, re.I):
+        return "#"
+    return html.escape(url, quote=True)
+
+
+def render_inline(text: str) -> str:
+    """Render inline markup; all text is HTML-escaped first."""
+    stash: list[str] = []
+
+    def keep(fragment: str) -> str:
+        stash.append(fragment)
+        return f"\x00{len(stash) - 1}\x00"
+
+    text = _CODE_SPAN.sub(lambda m: keep(f"<code>{html.escape(m.group(2).strip())}</code>"), text)
+
+    def link(m: re.Match) -> str:
+        title = f' title="{html.escape(m.group(3))}"' if m.group(3) else ""
+        label = render_inline(m.group(1))
+        return keep(f'<a href="{_safe_url(m.group(2))}"{title}>{label}</a>')
+
+    text = _LINK.sub(link, text)
+    text = _AUTOLINK.sub(lambda m: keep(f'<a href="{_safe_url(m.group(1))}">{html.escape(m.group(1))}</a>'), text)
+    text = _BARE_URL.sub(lambda m: keep(f'<a href="{_safe_url(m.group(1))}">{html.escape(m.group(1))}</a>'), text)
+
+    text = html.escape(text, quote=False)
+    text = _BOLD.sub(r"<strong>\2</strong>", text)
+    text = _ITALIC.sub(r"<em>\2</em>", text)
+    # Two trailing spaces or a backslash also force a break, as in CommonMark
+    text = re.sub(r"( {2,}|\\)\n", "\n", text)
+    text = text.replace("\n", "<br>\n")
+    return re.sub("\x00(\\d+)\x00", lambda m: stash[int(m.group(1))], text)
+
+
+def _indent(line: str) -> int:
+    return len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip(" "))
+
+
+def _render_list(lines: list[str], start: int) -> tuple[str, int]:
+    """Render the list starting at lines[start]; return (html, next index)."""
+    first = _LIST_ITEM.match(lines[start])
+    base = _indent(lines[start])
+    ordered = not first.group(2)[0] in "-*+"
+    tag = "ol" if ordered else "ul"
+    start_attr = ""
+    if ordered:
+        number = int(first.group(2)[:-1])
+        if number != 1:
+            start_attr = f' start="{number}"'
+    items: list[str] = []
+    i = start
+    while i < len(lines):
+        m = _LIST_ITEM.match(lines[i])
+        if not m or _indent(lines[i]) != base:
+            break
+        text_lines = [m.group(3)]
+        children: list[str] = []
+        i += 1
+        while i < len(lines):
+            line = lines[i]
+            if not line.strip():
+                # A blank line ends the item unless the list continues after it
+                j = i + 1
+                while j < len(lines) and not lines[j].strip():
+                    j += 1
+                if j < len(lines) and _indent(lines[j]) > base:
+                    i = j
+                    continue
+                if j < len(lines) and _LIST_ITEM.match(lines[j]) and _indent(lines[j]) == base:
+                    i = j
+                break
+            sub = _LIST_ITEM.match(line)
+            if sub and _indent(line) > base:
+                child, i = _render_list(lines, i)
+                children.append(child)
+                continue
+            if sub or _indent(line) < base or _HEADING.match(line) or _HR.match(line):
+                break
+            if children:
+                break
+            text_lines.append(line.strip())
+            i += 1
+        items.append(f"<li>{render_inline(chr(10).join(text_lines).rstrip())}{''.join(children)}</li>")
+    return f"<{tag}{start_attr}>\n" + "\n".join(items) + f"\n</{tag}>\n", i
+
+
+def render_markdown(md: str) -> str:
+    """Render a Markdown document to an HTML fragment."""
+    lines = md.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    out: list[str] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        fence = _FENCE.match(line)
+        if fence:
+            body: list[str] = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                body.append(lines[i])
+                i += 1
+            i += 1
+            lang = f' class="language-{html.escape(fence.group(2))}"' if fence.group(2) else ""
+            out.append(f"<pre><code{lang}>{html.escape(chr(10).join(body))}\n</code></pre>\n")
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{render_inline(heading.group(2))}</h{level}>\n")
+            i += 1
+            continue
+        if _HR.match(line):
+            out.append("<hr>\n")
+            i += 1
+            continue
+        if _LIST_ITEM.match(line):
+            rendered, i = _render_list(lines, i)
+            out.append(rendered)
+            continue
+        if _QUOTE.match(line):
+            quoted: list[str] = []
+            while i < len(lines) and lines[i].strip() and _QUOTE.match(lines[i]):
+                quoted.append(_QUOTE.match(lines[i]).group(1))
+                i += 1
+            out.append(f"<blockquote>\n{render_markdown(chr(10).join(quoted))}</blockquote>\n")
+            continue
+        para: list[str] = []
+        while i < len(lines) and lines[i].strip():
+            current = lines[i]
+            if para and (
+                _HEADING.match(current) or _HR.match(current) or _FENCE.match(current)
+                or _QUOTE.match(current) or _LIST_ITEM.match(current)
+            ):
+                break
+            para.append(current.strip() if not current.endswith("  ") else current.lstrip())
+            i += 1
+        out.append(f"<p>{render_inline(chr(10).join(para).rstrip())}</p>\n")
+    return "".join(out)
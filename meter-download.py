@@ -9,6 +9,10 @@ Key features:
  - Streams items to optional NDJSON file to avoid huge memory usage
  - Optionally also emits a single JSON array file (requires holding all items in memory)
  - Progress + basic metrics
+ - Several currencies at once (--currencies), downloaded concurrently over one shared
+   pool of keep-alive connections and one request rate limit, with an optional joined
+   file that puts each meter's prices in every currency side by side
+ - Cheap change detection (--probe) against a fingerprint saved by the last full download
 
 Usage examples:
   python meter-download.py --output all-prices.json
@@ -16,25 +20,72 @@ Usage examples:
   python meter-download.py --output all.json --ndjson all.ndjson
   python meter-download.py --max-pages 3 --ndjson sample.ndjson  (quick test)
   python meter-download.py --cognitive-services-only --ndjson cognitive.ndjson
+  python meter-download.py --cognitive-services-only --ndjson prices.ndjson --currencies USD,EUR,GBP --joined prices.joined.ndjson
+  python meter-download.py --cognitive-services-only --ndjson prices.ndjson --fingerprint fp.json
+  python meter-download.py --cognitive-services-only --probe --fingerprint fp.json; echo $?  (3 = unchanged)
 
 Notes:
 Full dataset is large (hundreds of thousands of items). Writing a JSON array file may
 consume substantial RAM. Prefer NDJSON for large-scale processing.
+
+With --currencies, the first currency is written to the --ndjson path and each
+other one next to it with the currency code before the extension
+(prices.ndjson -> prices.EUR.ndjson). Rows in the joined file are keyed by
+JOIN_KEY: meterId, region and tier, plus skuId, type and reservationTerm,
+because one meter can be billed under several SKUs (e.g. Free and Standard)
+in the same region and tier.
+
+--fingerprint PATH makes a complete download save a small summary of the data
+next to it: digests of the first page and of every item on the latest
+effectiveStartDate. --probe fetches only those two slices (the first page and
+an `effectiveStartDate ge <latest>` query, usually a handful of requests)
+and compares them with the saved digests. New or re-dated prices show up in
+the second query, and the first page catches changes to the oldest rows. It
+exits with EXIT_UNCHANGED (3) when both match and the last full download is
+younger than --probe-max-age days, and with 0 when a full download is needed.
+The age limit bounds how long an edit to a price in between those slices can
+go unnoticed.
+
+The fingerprint holds only the digests, and is rewritten only when they
+change, so it can be committed without producing a diff every night. The
+time of the last complete download is kept in a separate, uncommitted stamp
+file next to it (see crawl_stamp_path); without one, --probe asks for a full
+download.
 """
 
 from __future__ import annotations
 
 import argparse
+import gzip
+import hashlib
+import http.client
 import json
+import re
 import sys
+import threading
 import time
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
 from urllib import request, error, parse
 
+from fileutil import write_if_changed
+from profiling import Profiler, add_profile_argument, profiler_from_args
+
 API_ROOT = "https://prices.azure.com/api/retail/prices"
 USER_AGENT = "azure-retail-prices-downloader/1.0 (+https://learn.microsoft.com/)"
 DEFAULT_PAGE_SIZE = 1000  # informational; API fixed at 1000 items per page currently
+# Fields identifying the same price row across currencies in the --joined file
+JOIN_KEY = ("meterId", "armRegionName", "tierMinimumUnits", "skuId", "type", "reservationTerm")
+# Fields that differ between currencies; everything else is shared
+CURRENCY_FIELDS = ("currencyCode", "retailPrice", "unitPrice")
+FINGERPRINT_VERSION = 1
+# Exit status of --probe when the data matches the saved fingerprint
+EXIT_UNCHANGED = 3
+# The probe's latest-date query is expected to be small; more pages than this count as a change
+PROBE_MAX_PAGES = 20
 
 
 @dataclass
@@ -44,15 +95,94 @@ class PageResult:
 	count: int
 
 
-def fetch_url(url: str, *, timeout: int = 60, attempt: int = 1, max_attempts: int = 5) -> dict:
+class RateLimiter:
+	"""Spaces requests at most `rate` per second across all threads (no limit if rate is falsy)."""
+
+	def __init__(self, rate: float | None):
+		self.interval = 1.0 / rate if rate else 0.0
+		self._next = 0.0
+		self._lock = threading.Lock()
+
+	def wait(self) -> None:
+		if not self.interval:
+			return
+		with self._lock:
+			now = time.monotonic()
+			slot = max(self._next, now)
+			self._next = slot + self.interval
+		if slot > now:
+			time.sleep(slot - now)
+
+
+class ConnectionPool:
+	"""Keep-alive HTTP(S) connections shared by the download threads.
+
+	Each request borrows an idle connection to the host (or opens one) and returns
+	it afterwards, so paging reuses TCP/TLS sessions instead of reconnecting per
+	page. Failures are raised as urllib's HTTPError / URLError so fetch_url's
+	retry logic treats both code paths the same.
+	"""
+
+	def __init__(self, limiter: RateLimiter | None = None):
+		self.limiter = limiter or RateLimiter(None)
+		self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+		self._lock = threading.Lock()
+
+	def _acquire(self, scheme: str, host: str, timeout: int) -> http.client.HTTPConnection:
+		with self._lock:
+			idle = self._idle.get((scheme, host))
+			if idle:
+				return idle.pop()
+		cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+		return cls(host, timeout=timeout)
+
+	def _release(self, scheme: str, host: str, conn: http.client.HTTPConnection) -> None:
+		with self._lock:
+			self._idle.setdefault((scheme, host), []).append(conn)
+
+	def get(self, url: str, timeout: int = 60) -> str:
+		parts = parse.urlsplit(url)
+		target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+		headers = {"User-Agent": USER_AGENT, "Accept": "application/json", "Accept-Encoding": "gzip"}
+		self.limiter.wait()
+		conn = self._acquire(parts.scheme, parts.netloc, timeout)
+		try:
+			conn.request("GET", target, headers=headers)
+			resp = conn.getresponse()
+			body = resp.read()
+		except (OSError, http.client.HTTPException) as e:
+			conn.close()
+			raise error.URLError(e) from e
+		if resp.will_close:
+			conn.close()
+		else:
+			self._release(parts.scheme, parts.netloc, conn)
+		if resp.status >= 400:
+			raise error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+		if resp.getheader("Content-Encoding") == "gzip":
+			body = gzip.decompress(body)
+		return body.decode(resp.headers.get_content_charset() or "utf-8")
+
+	def close(self) -> None:
+		with self._lock:
+			for conns in self._idle.values():
+				for conn in conns:
+					conn.close()
+			self._idle.clear()
+
+
+def fetch_url(url: str, *, timeout: int = 60, attempt: int = 1, max_attempts: int = 5, pool: ConnectionPool | None = None) -> dict:
 	"""Fetch a URL returning parsed JSON with retries.
 
 	Implements exponential backoff on transient failures (HTTP >=500, URLError, timeout).
-	Raises the last exception if all attempts fail.
+	Raises the last exception if all attempts fail. With a pool, the request goes
+	over one of its keep-alive connections; otherwise through urlopen.
 	"""
-	headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
-	req = request.Request(url, headers=headers)
 	try:
+		if pool is not None:
+			return json.loads(pool.get(url, timeout=timeout))
+		headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+		req = request.Request(url, headers=headers)
 		with request.urlopen(req, timeout=timeout) as resp:
 			charset = resp.headers.get_content_charset() or "utf-8"
 			raw = resp.read().decode(charset)
@@ -62,18 +192,18 @@ def fetch_url(url: str, *, timeout: int = 60, attempt: int = 1, max_attempts: in
 		if attempt < max_attempts and (e.code >= 500 or e.code == 429):
 			backoff = 2 ** (attempt - 1)
 			time.sleep(backoff)
-			return fetch_url(url, timeout=timeout, attempt=attempt + 1, max_attempts=max_attempts)
+			return fetch_url(url, timeout=timeout, attempt=attempt + 1, max_attempts=max_attempts, pool=pool)
 		raise
 	except error.URLError:
 		if attempt < max_attempts:
 			backoff = 2 ** (attempt - 1)
 			time.sleep(backoff)
-			return fetch_url(url, timeout=timeout, attempt=attempt + 1, max_attempts=max_attempts)
+			return fetch_url(url, timeout=timeout, attempt=attempt + 1, max_attempts=max_attempts, pool=pool)
 		raise
 
 
-def get_page(url: str) -> PageResult:
-	data = fetch_url(url)
+def get_page(url: str, pool: ConnectionPool | None = None) -> PageResult:
+	data = fetch_url(url, pool=pool)
 	items = data.get("Items") or data.get("items") or []
 	next_link = data.get("NextPageLink") or data.get("nextPageLink")
 	count = data.get("Count") or data.get("count") or len(items)
@@ -133,53 +263,241 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
 		default=5,
 		help="Emit a progress line every N pages (default 5).",
 	)
-	return p.parse_args(argv)
-
+	p.add_argument(
+		"--currencies",
+		help="Comma-separated currency codes (e.g. USD,EUR,GBP) to download concurrently. The first goes to --ndjson, the others to <ndjson stem>.<CODE><suffix>. Default: the API's default (USD).",
+	)
+	p.add_argument(
+		"--joined",
+		help="With --currencies, also write an NDJSON file with one row per price row (see JOIN_KEY) holding its prices in every currency.",
+	)
+	p.add_argument(
+		"--max-rps",
+		type=float,
+		help="Limit requests per second across all currencies (default: no limit beyond --delay).",
+	)
+	p.add_argument(
+		"--fingerprint",
+		help="Fingerprint file: updated after a complete download if the data changed, compared by --probe.",
+	)
+	p.add_argument(
+		"--probe",
+		action="store_true",
+		help=f"Only check whether the data changed since --fingerprint was written; exit {EXIT_UNCHANGED} if not, 0 if a download is needed. Writes no data files.",
+	)
+	p.add_argument(
+		"--probe-max-age",
+		type=float,
+		default=7.0,
+		help="With --probe, report a change anyway once the last full download is older than this many days (default 7).",
+	)
+	add_profile_argument(p)
+	args = p.parse_args(argv)
+	if args.probe and not args.fingerprint:
+		p.error("--probe needs --fingerprint")
+	args.currencies = parse_currencies(p, args.currencies)
+	if len(args.currencies) > 1 and not args.ndjson:
+		p.error("--currencies with more than one currency needs --ndjson (the per-currency files are named after it)")
+	if args.joined and len(args.currencies) < 2:
+		p.error("--joined needs at least two --currencies")
+	return args
+
+
+def parse_currencies(p: argparse.ArgumentParser, value: str | None) -> list[str | None]:
+	if not value:
+		return [None]
+	codes = [c.strip().upper() for c in value.split(",") if c.strip()]
+	for code in codes:
+		if not re.fullmatch(r"[A-Z]{3}", code):
+			p.error(f"invalid currency code: {code!r}")
+	if len(set(codes)) != len(codes):
+		p.error("--currencies lists a currency more than once")
+	return codes or [None]
+
+
+def build_start_url(filter_expr: str | None, currency: str | None = None) -> str:
+	params = []
+	if currency:
+		params.append(f"currencyCode='{currency}'")
+	if filter_expr:
+		# Encode filter expression; keep OData operators and parentheses, but encode spaces.
+		safe_chars = "()=/,'"
+		params.append(f"$filter={parse.quote(filter_expr, safe=safe_chars)}")
+	return f"{API_ROOT}?{'&'.join(params)}" if params else API_ROOT
+
+
+def currency_path(ndjson: str, currency: str | None, index: int) -> str:
+	"""The first currency keeps the --ndjson path; others get the code before the suffix."""
+	if index == 0 or not currency:
+		return ndjson
+	path = Path(ndjson)
+	return str(path.with_name(f"{path.stem}.{currency}{path.suffix}"))
+
+
+def item_digest(item: dict) -> str:
+	return hashlib.sha256(json.dumps(item, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def digest_items(digests: t.Iterable[str]) -> dict:
+	"""Order-independent digest of a set of items, from their item_digest values."""
+	ordered = sorted(digests)
+	return {"count": len(ordered), "sha256": hashlib.sha256("".join(ordered).encode("ascii")).hexdigest()}
+
+
+def effective_date(item: dict) -> str:
+	return (item.get("effectiveStartDate") or "")[:10]
+
+
+def latest_date_query(filter_expr: str | None, latest: str) -> str:
+	date_filter = f"effectiveStartDate ge {latest}"
+	return f"({filter_expr}) and {date_filter}" if filter_expr else date_filter
+
+
+class FingerprintBuilder:
+	"""Accumulates a download's fingerprint page by page without keeping the items."""
+
+	def __init__(self, filter_expr: str | None, currency: str | None):
+		self.filter_expr = filter_expr
+		self.currency = currency
+		self.first_page: dict | None = None
+		self.latest = ""
+		self.latest_digests: list[str] = []
+		self.items = 0
+
+	def add_page(self, items: list[dict]) -> None:
+		digests = [item_digest(it) for it in items]
+		if self.first_page is None:
+			self.first_page = digest_items(digests)
+		for it, digest in zip(items, digests):
+			day = effective_date(it)
+			if day > self.latest:
+				self.latest, self.latest_digests = day, [digest]
+			elif day == self.latest:
+				self.latest_digests.append(digest)
+		self.items += len(items)
+
+	def result(self) -> dict:
+		return {
+			"version": FINGERPRINT_VERSION,
+			"filter": self.filter_expr,
+			"currency": self.currency,
+			"items": self.items,
+			"first_page": self.first_page or digest_items([]),
+			"latest_date": self.latest,
+			"latest_items": digest_items(self.latest_digests),
+		}
+
+
+def load_fingerprint(path: str) -> dict | None:
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			data = json.load(f)
+	except (FileNotFoundError, json.JSONDecodeError):
+		return None
+	return data if data.get("version") == FINGERPRINT_VERSION else None
 
-def build_start_url(filter_expr: str | None) -> str:
-	if not filter_expr:
-		return API_ROOT
-	# Encode filter expression; keep OData operators and parentheses, but encode spaces.
-	safe_chars = "()=/,'"
-	return f"{API_ROOT}?$filter={parse.quote(filter_expr, safe=safe_chars)}"
 
+def save_fingerprint(path: str, data: dict) -> bool:
+	"""Write the fingerprint unless the file already holds it; return True if written."""
+	target = Path(path)
+	target.parent.mkdir(parents=True, exist_ok=True)
+	return write_if_changed(target, json.dumps(data, indent=2) + "\n")
 
-def main(argv: list[str]) -> int:
-	args = parse_args(argv)
-	# Provide a sensible default: if user supplies no output flags, create an NDJSON file.
-	if not args.output and not args.ndjson:
-		args.ndjson = "prices.ndjson"
-		print("No --output/--ndjson specified; defaulting to NDJSON file 'prices.ndjson'.")
 
-	# If user only provided --output but left it empty (shouldn't happen normally), set a default filename.
-	if args.output == "":  # defensive; argparse typically won't produce empty string unless explicitly given
-		args.output = "prices.json"
+def crawl_stamp_path(fingerprint: str) -> Path:
+	"""Where the time of the last complete download is kept: a dotfile next to the fingerprint."""
+	path = Path(fingerprint)
+	return path.with_name(f".{path.stem}.crawled")
 
-	# Build combined filter expression if cognitive services convenience flag used
-	combined_filter: str | None = args.filter
-	if getattr(args, "cognitive_services_only", False):
-		cs_filter = "serviceName eq 'Cognitive Services'"
-		if combined_filter:
-			combined_filter = f"({cs_filter}) and ({combined_filter})"
-		else:
-			combined_filter = cs_filter
 
-	start_url = build_start_url(combined_filter)
-	all_items: list[dict] | None = [] if args.output else None
-	ndjson_fp = open(args.ndjson, "w", encoding="utf-8") if args.ndjson else None
+def load_crawl_stamp(fingerprint: str) -> datetime | None:
+	try:
+		return datetime.fromisoformat(crawl_stamp_path(fingerprint).read_text(encoding="utf-8").strip())
+	except (FileNotFoundError, ValueError):
+		return None
+
+
+def save_crawl_stamp(fingerprint: str) -> None:
+	crawl_stamp_path(fingerprint).write_text(datetime.now(timezone.utc).isoformat(timespec="seconds") + "\n", encoding="utf-8")
+
+
+def probe(args: argparse.Namespace, filter_expr: str | None, pool: ConnectionPool) -> int:
+	"""Compare the API's first page and latest-date items with the saved fingerprint."""
+	currency = args.currencies[0]
+	saved = load_fingerprint(args.fingerprint)
+	if saved is None:
+		print(f"Probe: no usable fingerprint at {args.fingerprint}; a full download is needed.")
+		return 0
+	if saved.get("filter") != filter_expr or saved.get("currency") != currency:
+		print("Probe: the fingerprint was written for a different filter or currency; a full download is needed.")
+		return 0
+	if not saved["latest_date"]:
+		# No dated items to anchor the `effectiveStartDate ge` query on
+		print("Probe: the fingerprint has no latest effectiveStartDate; a full download is needed.")
+		return 0
+	crawled = load_crawl_stamp(args.fingerprint)
+	if crawled is None:
+		print(f"Probe: no record of the last full download at {crawl_stamp_path(args.fingerprint)}; a full download is needed.")
+		return 0
+	age_days = (datetime.now(timezone.utc) - crawled).total_seconds() / 86400
+	if age_days > args.probe_max_age:
+		print(f"Probe: the last full download is {age_days:.1f} days old (limit {args.probe_max_age:g}); a full download is needed.")
+		return 0
+
+	requests_made = 1
+	first = get_page(build_start_url(filter_expr, currency), pool)
+	first_page = digest_items(item_digest(it) for it in first.items)
+	if first_page != saved["first_page"]:
+		print("Probe: the first page changed; a full download is needed.")
+		return 0
+
+	digests: list[str] = []
+	url = build_start_url(latest_date_query(filter_expr, saved["latest_date"]), currency)
+	while url:
+		if requests_made > PROBE_MAX_PAGES:
+			print(f"Probe: more than {PROBE_MAX_PAGES} pages on or after {saved['latest_date']}; a full download is needed.")
+			return 0
+		page = get_page(url, pool)
+		requests_made += 1
+		digests.extend(item_digest(it) for it in page.items if effective_date(it) >= saved["latest_date"])
+		url = page.next_link
+	# Anything dated after the saved latest date is new and changes the digest
+	latest_items = digest_items(digests)
+	if latest_items != saved["latest_items"]:
+		print(
+			f"Probe: items on or after {saved['latest_date']} changed "
+			f"({saved['latest_items']['count']} -> {latest_items['count']}); a full download is needed."
+		)
+		return 0
+	print(f"Probe: unchanged since the full download of {crawled.isoformat()} ({requests_made} requests).")
+	return EXIT_UNCHANGED
+
+
+def download_currency(
+	start_url: str,
+	ndjson_path: str | None,
+	all_items: list[dict] | None,
+	args: argparse.Namespace,
+	pool: ConnectionPool,
+	filter_desc: str,
+	label: str = "",
+	fingerprint: FingerprintBuilder | None = None,
+) -> tuple[int, int]:
+	"""Walk one currency's pages into its NDJSON file (and all_items); return (pages, items)."""
+	ndjson_fp = open(ndjson_path, "w", encoding="utf-8") if ndjson_path else None
 	t0 = time.time()
 	page_count = 0
 	item_count = 0
 	next_url = start_url
-
 	try:
 		while next_url:
 			page_count += 1
-			page = get_page(next_url)
+			page = get_page(next_url, pool)
 			if page_count == 1:
 				# Provide some context header
-				print(
-					f"Starting download. Filter={'NONE' if not combined_filter else combined_filter}. First page count={page.count}")
+				print(f"{label}Starting download. Filter={filter_desc}. First page count={page.count}")
+			if fingerprint is not None:
+				fingerprint.add_page(page.items)
 			for it in page.items:
 				item_count += 1
 				if all_items is not None:
@@ -190,32 +508,154 @@ def main(argv: list[str]) -> int:
 				elapsed = time.time() - t0
 				rate = item_count / elapsed if elapsed > 0 else 0
 				print(
-					f"Pages={page_count} Items={item_count} LastPageCount={page.count} Rate={rate:,.0f} items/s"
+					f"{label}Pages={page_count} Items={item_count} LastPageCount={page.count} Rate={rate:,.0f} items/s"
 				)
 			if args.max_pages and page_count >= args.max_pages:
-				print("Reached max pages limit (testing mode); stopping early.")
+				print(f"{label}Reached max pages limit (testing mode); stopping early.")
 				break
 			next_url = page.next_link
 			if next_url and args.delay:
 				time.sleep(args.delay)
-
-		elapsed = time.time() - t0
-		print(
-			f"Finished. Pages={page_count} Items={item_count} Elapsed={elapsed:.1f}s AvgRate={(item_count/elapsed) if elapsed>0 else 0:,.0f} items/s"
-		)
-
-		if all_items is not None:
-			print(f"Writing JSON array to {args.output} ...")
-			with open(args.output, "w", encoding="utf-8") as fp:
-				json.dump(all_items, fp, ensure_ascii=False)
-			print("JSON array file complete.")
 	finally:
 		if ndjson_fp is not None:
 			ndjson_fp.close()
+	return page_count, item_count
+
+
+def write_joined(paths: dict[str, str], joined_path: str) -> int:
+	"""Merge the per-currency NDJSON files into one row per JOIN_KEY; return the row count.
+
+	Shared fields come from the first currency that has the row; `prices` maps
+	each currency code to its retailPrice and unitPrice. A row missing from a
+	currency simply has no entry for it.
+	"""
+	rows: dict[tuple, dict] = {}
+	for currency, path in paths.items():
+		with open(path, "r", encoding="utf-8") as f:
+			for line in f:
+				if not line.strip():
+					continue
+				item = json.loads(line)
+				key = tuple(item.get(k) for k in JOIN_KEY)
+				row = rows.get(key)
+				if row is None:
+					row = {k: v for k, v in item.items() if k not in CURRENCY_FIELDS}
+					row["prices"] = {}
+					rows[key] = row
+				row["prices"][currency] = {"retailPrice": item.get("retailPrice"), "unitPrice": item.get("unitPrice")}
+	with open(joined_path, "w", encoding="utf-8") as f:
+		for row in rows.values():
+			f.write(json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n")
+	return len(rows)
+
+
+def download(args: argparse.Namespace, profiler: Profiler) -> int:
+	# Build combined filter expression if cognitive services convenience flag used
+	combined_filter: str | None = args.filter
+	if getattr(args, "cognitive_services_only", False):
+		cs_filter = "serviceName eq 'Cognitive Services'"
+		if combined_filter:
+			combined_filter = f"({cs_filter}) and ({combined_filter})"
+		else:
+			combined_filter = cs_filter
+
+	if args.probe:
+		pool = ConnectionPool(RateLimiter(args.max_rps))
+		try:
+			with profiler.phase("probe"):
+				return probe(args, combined_filter, pool)
+		finally:
+			pool.close()
+
+	# Provide a sensible default: if user supplies no output flags, create an NDJSON file.
+	if not args.output and not args.ndjson:
+		args.ndjson = "prices.ndjson"
+		print("No --output/--ndjson specified; defaulting to NDJSON file 'prices.ndjson'.")
+
+	# If user only provided --output but left it empty (shouldn't happen normally), set a default filename.
+	if args.output == "":  # defensive; argparse typically won't produce empty string unless explicitly given
+		args.output = "prices.json"
+
+	filter_desc = combined_filter or "NONE"
+	currencies = args.currencies
+	paths = {c: currency_path(args.ndjson, c, i) if args.ndjson else None for i, c in enumerate(currencies)}
+	# The JSON array holds the first currency only
+	all_items: list[dict] | None = [] if args.output else None
+	# The fingerprint describes the first currency, the one --probe checks
+	fingerprint = FingerprintBuilder(combined_filter, currencies[0]) if args.fingerprint else None
+	pool = ConnectionPool(RateLimiter(args.max_rps))
+	t0 = time.time()
+
+	try:
+		with profiler.phase("download"):
+			if len(currencies) == 1:
+				currency = currencies[0]
+				totals = [
+					download_currency(
+						build_start_url(combined_filter, currency), paths[currency], all_items, args, pool, filter_desc, fingerprint=fingerprint
+					)
+				]
+			else:
+				# One thread per currency; they are I/O bound and share the pool and rate limit
+				with ThreadPoolExecutor(max_workers=len(currencies)) as executor:
+					futures = [
+						executor.submit(
+							download_currency,
+							build_start_url(combined_filter, currency),
+							paths[currency],
+							all_items if i == 0 else None,
+							args,
+							pool,
+							filter_desc,
+							f"[{currency}] ",
+							fingerprint if i == 0 else None,
+						)
+						for i, currency in enumerate(currencies)
+					]
+					totals = [f.result() for f in futures]
+	finally:
+		pool.close()
+
+	page_count = sum(pages for pages, _ in totals)
+	item_count = sum(items for _, items in totals)
+	elapsed = time.time() - t0
+	print(
+		f"Finished. Pages={page_count} Items={item_count} Elapsed={elapsed:.1f}s AvgRate={(item_count/elapsed) if elapsed>0 else 0:,.0f} items/s"
+	)
+	if len(currencies) > 1:
+		for currency, (pages, items) in zip(currencies, totals):
+			print(f"  {currency}: Pages={pages} Items={items} -> {paths[currency]}")
+
+	if args.joined:
+		with profiler.phase("join"):
+			rows = write_joined(paths, args.joined)
+		print(f"Wrote {rows} joined rows ({', '.join(currencies)}) to {args.joined}")
+
+	if all_items is not None:
+		print(f"Writing JSON array to {args.output} ...")
+		with profiler.phase("write"), open(args.output, "w", encoding="utf-8") as fp:
+			json.dump(all_items, fp, ensure_ascii=False)
+		print("JSON array file complete.")
+
+	if fingerprint is not None:
+		if args.max_pages and totals[0][0] >= args.max_pages:
+			print("Not writing the fingerprint: the download stopped at --max-pages.")
+		else:
+			if save_fingerprint(args.fingerprint, fingerprint.result()):
+				print(f"Fingerprint written to {args.fingerprint}")
+			else:
+				print(f"Fingerprint unchanged in {args.fingerprint}")
+			save_crawl_stamp(args.fingerprint)
 
 	return 0
 
 
+def main(argv: list[str]) -> int:
+	args = parse_args(argv)
+	with profiler_from_args("meter-download", args) as profiler:
+		return download(args, profiler)
+
+
 if __name__ == "__main__":  # pragma: no cover
 	raise SystemExit(main(sys.argv[1:]))
 
@@ -5,34 +5,123 @@ Generate a JSON manifest of Markdown summaries.
 Creates monthly/aisummary/index.json listing all .md files sorted newest-first.
 
 Usage:
-  python monthly/generate-index.py [array|object]
+  python monthly/generate-index.py [array|object|rich] [--page-size N]
 
 If 'object' is passed, writes {"files": [...]} instead of a bare array.
+
+If 'rich' is passed, writes {"files": [...], "entries": [...], "pages": [...]}.
+"files" keeps older readers working; each entry carries the file's title (its
+first H1), date, byte size, SHA-256 and a short plain-text excerpt, so a page
+can list every summary from this one request and fetch a file's markdown only
+when it is opened. The entries are also split into index-1.json, index-2.json,
+... of --page-size entries each (default 50) for archives too large to load at
+once; each page links to the next.
 """
 
 from pathlib import Path
+import argparse
+import hashlib
 import json
+import re
 import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from profiling import Profiler, add_profile_argument, profiler_from_args  # noqa: E402
+
+DEFAULT_PAGE_SIZE = 50
+EXCERPT_CHARS = 160
+
+
+def _plain(line: str) -> str:
+    """Strip the markdown that commonly appears in the first lines of a summary."""
+    line = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", line)
+    line = re.sub(r"[*_`#>]+", "", line)
+    return re.sub(r"^\s*([-+]|\d+[.)])\s+", "", line).strip()
+
+
+def describe(path: Path) -> dict:
+    """Return the rich manifest entry for one summary file."""
+    data = path.read_bytes()
+    text = data.decode("utf-8", errors="replace")
+    title = path.stem
+    excerpt_parts: list[str] = []
+    for line in text.splitlines():
+        if title == path.stem and re.match(r"^#\s+\S", line):
+            title = line.lstrip("#").strip()
+            continue
+        if line.lstrip().startswith("#") or re.match(r"^\s*([-*_])(\s*\1){2,}\s*$", line):
+            continue
+        plain = _plain(line)
+        if plain:
+            excerpt_parts.append(plain)
+        if sum(len(p) + 1 for p in excerpt_parts) >= EXCERPT_CHARS:
+            break
+    excerpt = " ".join(excerpt_parts)
+    if len(excerpt) > EXCERPT_CHARS:
+        excerpt = excerpt[: EXCERPT_CHARS - 1].rsplit(" ", 1)[0] + "…"
+    return {
+        "file": path.name,
+        "date": path.stem,
+        "title": title,
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "excerpt": excerpt,
+    }
+
+
+def write_json(path: Path, data) -> None:
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def write_pages(aisummary: Path, entries: list[dict], page_size: int) -> list[str]:
+    """Write index-<n>.json pages and remove pages left over from a larger archive."""
+    chunks = [entries[i:i + page_size] for i in range(0, len(entries), page_size)] or [[]]
+    names = [f"index-{n}.json" for n in range(1, len(chunks) + 1)]
+    for n, (name, chunk) in enumerate(zip(names, chunks), start=1):
+        write_json(aisummary / name, {
+            "page": n,
+            "pages": len(chunks),
+            "total": len(entries),
+            "next": names[n] if n < len(names) else None,
+            "entries": chunk,
+        })
+    for stale in aisummary.glob("index-*.json"):
+        if stale.name not in names:
+            stale.unlink()
+    return names
+
 
-def main(out_format: str = "array") -> int:
+def main(out_format: str = "array", page_size: int = DEFAULT_PAGE_SIZE, profiler: Profiler | None = None) -> int:
+    profiler = profiler or Profiler("generate-index", None)
     base_dir = Path(__file__).resolve().parent
     aisummary = base_dir / "aisummary"
     if not aisummary.is_dir():
         print(f"ERROR: Directory not found: {aisummary}", file=sys.stderr)
         return 1
 
-    files = sorted((p.name for p in aisummary.glob("*.md")), reverse=True)
+    with profiler.phase("load"):
+        paths = sorted(aisummary.glob("*.md"), key=lambda p: p.name, reverse=True)
+        files = [p.name for p in paths]
+        entries = [describe(p) for p in paths] if out_format == "rich" else []
 
     out_path = aisummary / "index.json"
-    data = {"files": files} if out_format == "object" else list(files)
-    out_path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    with profiler.phase("write"):
+        if out_format == "rich":
+            pages = write_pages(aisummary, entries, page_size)
+            data = {"files": files, "entries": entries, "page_size": page_size, "pages": pages}
+        else:
+            data = {"files": files} if out_format == "object" else list(files)
+        write_json(out_path, data)
     print(f"Wrote {out_path} with {len(files)} entries.")
     return 0
 
 
 if __name__ == "__main__":
-    fmt = "array"
-    if len(sys.argv) > 1 and sys.argv[1] in ("array", "object"):
-        fmt = sys.argv[1]
-    raise SystemExit(main(fmt))
+    parser = argparse.ArgumentParser(description="Generate monthly/aisummary/index.json")
+    parser.add_argument("format", nargs="?", default="array", choices=("array", "object", "rich"))
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Entries per index-<n>.json page in rich format (default 50)")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    with profiler_from_args("generate-index", args) as profiler:
+        code = main(args.format, args.page_size, profiler)
+    raise SystemExit(code)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Run the daily data pipeline as a DAG of stages with declared inputs and outputs.
+
+Stages (in dependency order):
+
+  download   meter-download.py -> prices.ndjson (always runs; its input is the prices API)
+  split      prices.ndjson -> monthly/full/*.ndjson, monthly/partial/*.ndjson
+  summaries  monthly/partial/*.ndjson -> monthly/aisummary/*.md (create-ai-summaries.py)
+  metadata   prices.ndjson -> metadata.json (last_updated timestamp, only when the data changed)
+
+Before a stage runs, its input files (and any environment settings it depends
+on) are hashed and compared with the fingerprint recorded after its last
+successful run in monthly/pipeline-state.json. Stages whose inputs are
+unchanged and whose outputs exist are skipped. The download is written to a
+temporary file and only replaces prices.ndjson when its content differs, so a
+night with no price changes skips everything after the download. Before
+downloading, the stage runs meter-download.py --probe against the fingerprint
+saved by the previous download (monthly/prices-fingerprint.json). When the
+probe reports no change, the full crawl is skipped too and the night costs a
+few API requests. The fingerprint only changes when the prices do; the time
+of the last full crawl lives in an uncommitted stamp next to it.
+
+Changed dates flow downstream: split reports the partial files whose content
+changed, and summaries only considers those dates (plus any partial file that
+changed since its own last success). A change to a stage's code or settings
+makes it consider everything again.
+
+A per-stage timing report is printed at the end, written to --report as JSON
+if given, and appended to $GITHUB_STEP_SUMMARY when running in Actions.
+
+Usage:
+  python pipeline.py
+  python pipeline.py --skip-download      # reuse the local prices.ndjson
+  python pipeline.py --no-probe           # always do the full download
+  python pipeline.py --dry-run            # show which stages would run
+  python pipeline.py --force --report pipeline-report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Callable
+
+from fileutil import write_if_changed
+
+BASE_DIR = Path(__file__).resolve().parent
+STATE_PATH = Path(os.getenv("PIPELINE_STATE_PATH", BASE_DIR / "monthly" / "pipeline-state.json"))
+STATE_VERSION = 1
+PRICES_FILE = "prices.ndjson"
+FINGERPRINT_FILE = "monthly/prices-fingerprint.json"
+# meter-download.py --probe exits with this when the prices match the fingerprint
+PROBE_UNCHANGED = 3
+PARTIAL_GLOB = "monthly/partial/*.ndjson"
+
+
+@dataclass
+class StageOutcome:
+    # Dates whose data this stage changed; None means "unknown / possibly all"
+    changed_dates: set[str] | None = None
+    detail: str = ""
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[["RunContext", "Stage"], StageOutcome]
+    inputs: tuple[str, ...] = ()  # paths or globs relative to BASE_DIR
+    outputs: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    env: tuple[str, ...] = ()  # environment settings that count as inputs
+    always: bool = False  # inputs live outside the repo (e.g. the prices API)
+
+
+@dataclass
+class StageReport:
+    name: str
+    status: str  # ran, skipped, failed, blocked
+    seconds: float = 0.0
+    detail: str = ""
+    changed_dates: list[str] | None = None
+
+
+@dataclass
+class RunContext:
+    args: argparse.Namespace
+    state: dict[str, dict]
+    outcomes: dict[str, StageOutcome] = field(default_factory=dict)
+    # Input paths each stage saw change since its last success (None = no record)
+    changed_inputs: dict[str, set[str] | None] = field(default_factory=dict)
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_inputs(stage: Stage) -> dict[str, str]:
+    """Map each input file (relative path) and env setting to a content hash."""
+    hashes: dict[str, str] = {}
+    for pattern in stage.inputs:
+        for path in sorted(glob.glob(str(BASE_DIR / pattern))):
+            hashes[Path(path).relative_to(BASE_DIR).as_posix()] = sha256_file(Path(path))
+    for name in stage.env:
+        hashes[f"env:{name}"] = hashlib.sha256(os.getenv(name, "").encode("utf-8")).hexdigest()
+    return hashes
+
+
+def fingerprint(hashes: dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def outputs_exist(stage: Stage) -> bool:
+    return all(glob.glob(str(BASE_DIR / pattern)) for pattern in stage.outputs)
+
+
+def changed_paths(previous: dict[str, str] | None, current: dict[str, str]) -> set[str] | None:
+    """Inputs added, removed or modified since the last success; None if there was none."""
+    if previous is None:
+        return None
+    return {k for k in previous.keys() | current.keys() if previous.get(k) != current.get(k)}
+
+
+def load_state(path: Path = STATE_PATH) -> dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != STATE_VERSION:
+        return {}
+    return data.get("stages", {})
+
+
+def save_state(state: dict[str, dict], path: Path = STATE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_if_changed(path, json.dumps({"version": STATE_VERSION, "stages": state}, indent=2, sort_keys=True) + "\n")
+
+
+def run_script(*argv: str) -> int:
+    """Run one of the repo's scripts with the current interpreter, streaming its output."""
+    return subprocess.run([sys.executable, *argv], cwd=str(BASE_DIR)).returncode
+
+
+class StageFailed(Exception):
+    pass
+
+
+# --- Stages -------------------------------------------------------------------
+
+
+def run_download(ctx: RunContext, stage: Stage) -> StageOutcome:
+    target = BASE_DIR / PRICES_FILE
+    if ctx.args.skip_download:
+        if not target.exists():
+            raise StageFailed(f"--skip-download given but {PRICES_FILE} does not exist")
+        return StageOutcome(detail="skipped by --skip-download")
+    fingerprint = str(BASE_DIR / FINGERPRINT_FILE)
+    if target.exists() and not (ctx.args.force or ctx.args.no_probe):
+        code = run_script("meter-download.py", "--cognitive-services-only", "--probe", "--fingerprint", fingerprint)
+        if code == PROBE_UNCHANGED:
+            return StageOutcome(detail="probe: prices unchanged, download skipped")
+        if code != 0:
+            # A failed probe only costs us the shortcut
+            print(f"meter-download.py --probe exited with {code}; doing a full download")
+    tmp = target.with_name(target.name + ".download")
+    code = run_script("meter-download.py", "--cognitive-services-only", "--ndjson", str(tmp), "--fingerprint", fingerprint)
+    if code != 0:
+        tmp.unlink(missing_ok=True)
+        raise StageFailed(f"meter-download.py exited with {code}")
+    if target.exists() and sha256_file(tmp) == sha256_file(target):
+        tmp.unlink()
+        return StageOutcome(detail=f"{PRICES_FILE} unchanged")
+    os.replace(tmp, target)
+    return StageOutcome(detail=f"{PRICES_FILE} updated")
+
+
+def run_split(ctx: RunContext, stage: Stage) -> StageOutcome:
+    import split_into_monthly as split
+
+    full_dir = str(BASE_DIR / "monthly" / "full")
+    partial_dir = str(BASE_DIR / "monthly" / "partial")
+    items = split.load_local_prices(str(BASE_DIR / PRICES_FILE))
+    groups = split.group_by_effective_date(items)
+    changed_full = split.write_ndjson(groups, full_dir)
+    # Only the changed full files need re-filtering, unless the filter itself changed
+    changed = ctx.changed_inputs.get(stage.name)
+    rebuild_all = changed is None or "split_into_monthly.py" in changed or not os.path.isdir(partial_dir)
+    changed_partial = split.filter_ndjson_directory(full_dir, partial_dir, split.FILTER_KEYS, None if rebuild_all else changed_full)
+    dates = {Path(name).stem for name in changed_partial}
+    return StageOutcome(
+        changed_dates=dates,
+        detail=f"{len(items)} items, {len(groups)} dates; {len(changed_full)} full / {len(changed_partial)} partial files changed",
+    )
+
+
+def run_summaries(ctx: RunContext, stage: Stage) -> StageOutcome:
+    dates = summary_dates(ctx, stage)
+    argv = ["create-ai-summaries.py"]
+    if ctx.args.force:
+        argv.append("--force")
+    elif dates is not None:
+        if not dates:
+            return StageOutcome(changed_dates=set(), detail="no changed dates")
+        argv += ["--dates", ",".join(sorted(dates))]
+    code = run_script(*argv)
+    if code != 0:
+        raise StageFailed(f"create-ai-summaries.py exited with {code}")
+    scope = "all dates" if dates is None or ctx.args.force else f"{len(dates)} changed dates"
+    return StageOutcome(changed_dates=dates, detail=f"considered {scope}")
+
+
+def summary_dates(ctx: RunContext, stage: Stage) -> set[str] | None:
+    """Dates the summary stage must look at, or None for all of them."""
+    changed = ctx.changed_inputs.get(stage.name)
+    if changed is None or any(not p.startswith("monthly/partial/") for p in changed):
+        # First run, or the prompt/code/settings changed: let the summary cache decide
+        return None
+    dates = {Path(p).stem for p in changed}
+    for upstream in stage.after:
+        outcome = ctx.outcomes.get(upstream)
+        if outcome is not None and outcome.changed_dates is not None:
+            dates |= outcome.changed_dates
+    return dates
+
+
+def run_metadata(ctx: RunContext, stage: Stage) -> StageOutcome:
+    formatted_time = datetime.now(timezone.utc).strftime("%d %B %Y %H:%M UTC")
+    with open(BASE_DIR / "metadata.json", "w") as f:
+        json.dump({"last_updated": formatted_time}, f, indent=2)
+    return StageOutcome(detail=f"last_updated = {formatted_time}")
+
+
+STAGES = [
+    Stage("download", run_download, outputs=(PRICES_FILE,), always=True),
+    Stage(
+        "split",
+        run_split,
+        inputs=(PRICES_FILE, "split_into_monthly.py"),
+        outputs=("monthly/full/*.ndjson", PARTIAL_GLOB),
+        after=("download",),
+    ),
+    Stage(
+        "summaries",
+        run_summaries,
+        inputs=(PARTIAL_GLOB, "create-ai-summaries.py", "summarizer.py", "compact_encoding.py"),
+        outputs=("monthly/aisummary/*.md",),
+        after=("split",),
+        env=("AZURE_OPENAI_API_MODEL", "AI_SUMMARY_PROVIDERS", "AI_SUMMARY_ENCODING", "AI_SUMMARY_CHUNK_TOKENS"),
+    ),
+    Stage("metadata", run_metadata, inputs=(PRICES_FILE,), outputs=("metadata.json",), after=("summaries",)),
+]
+
+
+# --- Runner -------------------------------------------------------------------
+
+
+def stage_order(stages: list[Stage]) -> list[Stage]:
+    by_name = {s.name: s for s in stages}
+    graph = {s.name: set(s.after) for s in stages}
+    # Keep the declared order among stages that are ready at the same time
+    order: list[str] = []
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()
+    while sorter.is_active():
+        ready = sorted(sorter.get_ready(), key=[s.name for s in stages].index)
+        order.extend(ready)
+        sorter.done(*ready)
+    return [by_name[name] for name in order]
+
+
+def run_pipeline(ctx: RunContext, stages: list[Stage]) -> list[StageReport]:
+    reports: list[StageReport] = []
+    failed: set[str] = set()
+    for stage in stage_order(stages):
+        blocked_by = [dep for dep in stage.after if dep in failed]
+        if blocked_by:
+            failed.add(stage.name)
+            reports.append(StageReport(stage.name, "blocked", detail=f"after failed {', '.join(blocked_by)}"))
+            continue
+
+        t0 = time.perf_counter()
+        hashes = hash_inputs(stage)
+        previous = ctx.state.get(stage.name)
+        ctx.changed_inputs[stage.name] = changed_paths(previous.get("inputs") if previous else None, hashes)
+        current = fingerprint(hashes)
+        up_to_date = (
+            not stage.always
+            and not ctx.args.force
+            and previous is not None
+            and previous.get("fingerprint") == current
+            and outputs_exist(stage)
+        )
+        if up_to_date:
+            ctx.outcomes[stage.name] = StageOutcome(changed_dates=set())
+            reports.append(StageReport(stage.name, "skipped", time.perf_counter() - t0, "inputs unchanged", []))
+            continue
+        if ctx.args.dry_run:
+            if stage.always:
+                reason = "always runs"
+            elif ctx.args.force:
+                reason = "forced"
+            else:
+                reason = "no previous run" if previous is None else "inputs changed"
+            reports.append(StageReport(stage.name, "would run", time.perf_counter() - t0, reason))
+            continue
+
+        print(f"== {stage.name} ==", flush=True)
+        try:
+            outcome = stage.run(ctx, stage)
+        except StageFailed as e:
+            failed.add(stage.name)
+            reports.append(StageReport(stage.name, "failed", time.perf_counter() - t0, str(e)))
+            print(f"Error: stage {stage.name} failed: {e}", flush=True)
+            continue
+        ctx.outcomes[stage.name] = outcome
+        seconds = time.perf_counter() - t0
+        # Record the inputs as they were when the stage started, so a change made
+        # while it ran is still seen next time. Nothing run-specific (times) goes
+        # in: the file is committed, and a no-op run must leave it unchanged
+        ctx.state[stage.name] = {"fingerprint": current, "inputs": hashes}
+        save_state(ctx.state)
+        dates = sorted(outcome.changed_dates) if outcome.changed_dates is not None else None
+        reports.append(StageReport(stage.name, "ran", seconds, outcome.detail, dates))
+    return reports
+
+
+def format_report(reports: list[StageReport], total: float) -> str:
+    lines = [f"{'stage':<11}{'status':<11}{'seconds':>9}  detail"]
+    for r in reports:
+        lines.append(f"{r.name:<11}{r.status:<11}{r.seconds:>9.2f}  {r.detail}")
+    lines.append(f"{'total':<22}{total:>9.2f}")
+    return "\n".join(lines)
+
+
+def write_step_summary(reports: list[StageReport], total: float) -> None:
+    path = os.getenv("GITHUB_STEP_SUMMARY")
+    if not path:
+        return
+    rows = ["| Stage | Status | Seconds | Detail |", "| --- | --- | ---: | --- |"]
+    rows += [f"| {r.name} | {r.status} | {r.seconds:.2f} | {r.detail} |" for r in reports]
+    rows.append(f"| **total** | | {total:.2f} | |")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("### Pipeline stages\n\n" + "\n".join(rows) + "\n")
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Run the download -> split -> summaries -> metadata pipeline, skipping unchanged stages.")
+    p.add_argument("--force", action="store_true", help="Run every stage (and regenerate every summary) regardless of input hashes")
+    p.add_argument("--skip-download", action="store_true", help=f"Use the existing {PRICES_FILE} instead of downloading")
+    p.add_argument("--no-probe", action="store_true", help="Download the full price list even if the change probe finds nothing new")
+    p.add_argument("--dry-run", action="store_true", help="Report which stages would run without running them")
+    p.add_argument("--report", help="Also write the per-stage timing report to this JSON file")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+    ctx = RunContext(args=args, state=load_state())
+    t0 = time.perf_counter()
+    reports = run_pipeline(ctx, STAGES)
+    total = time.perf_counter() - t0
+
+    print(format_report(reports, total))
+    write_step_summary(reports, total)
+    if args.report:
+        data = {"total_seconds": round(total, 2), "stages": [vars(r) | {"seconds": round(r.seconds, 2)} for r in reports]}
+        Path(args.report).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    return 1 if any(r.status in ("failed", "blocked") for r in reports) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Query the downloaded price data: filter, group by and aggregate price fields.
+
+Reads prices.ndjson (or a directory of date files such as monthly/full) as a
+stream, so memory stays flat however large the dump is:
+
+  python price_query.py --where "meterName~GPT 5" --where "meterName~Batch Inpt" \\
+      --group-by armRegionName --agg "min(unitPrice),count" --sort "min(unitPrice)" --limit 10
+  python price_query.py --source monthly/full --since 2025-06-01 --where "productName~OpenAI" \\
+      --select productName,meterName,unitPrice --sort unitPrice:desc --limit 20
+  python price_query.py --where "unitPrice>10" --select "*" --format ndjson > expensive.ndjson
+
+--where FIELD OP VALUE (repeatable; every filter must hold). The text operators
+match the explorer's filters in index.html (case-insensitive):
+
+  =  !=      equals / not equal
+  ~  !~      contains / does not contain
+  ^= $=      starts with / ends with
+  < <= > >=  numeric when both sides are numbers; otherwise the field's first
+             len(VALUE) characters are compared, so effectiveStartDate<=2025-06
+             includes all of June
+
+--sort orders rows as the explorer does (see collation_key).
+
+--agg takes count, count(FIELD), min, max, sum, avg and distinct (number of
+distinct values) over a field, e.g. "min(unitPrice),max(unitPrice),count".
+
+Each line gets as little work as the query allows:
+ - a directory source is pruned by file name (YYYY-MM-DD.ndjson) to the
+   effectiveStartDate range given by --since/--until and effectiveStartDate filters
+ - the positive text filters (=, ~, ^=, $=) are first checked as byte
+   substrings of the raw line, and lines that cannot match are skipped before
+   json.loads. This only applies to plain ASCII lines without escapes, and
+   to number fields only for values without digits (true, false), where the
+   check cannot reject a match
+ - after parsing, only the fields the query uses are kept; aggregates are
+   folded as records stream past, --sort with --limit keeps only the top rows,
+   and --limit without --sort stops reading early
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_SOURCE = BASE_DIR / "prices.ndjson"
+# Used when prices.ndjson has not been downloaded
+FALLBACK_SOURCE = BASE_DIR / "monthly" / "full"
+DEFAULT_FIELDS = ("productName", "meterName", "unitPrice", "unitOfMeasure", "armRegionName", "effectiveStartDate")
+DATE_FIELD = "effectiveStartDate"
+DATE_FILE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Fields the Retail Prices API always returns as JSON strings, so a quoted needle is safe for them
+STRING_FIELDS = frozenset({
+    "currencyCode", "armRegionName", "location", "effectiveStartDate", "meterId", "meterName", "productId",
+    "skuId", "productName", "skuName", "serviceName", "serviceId", "serviceFamily", "unitOfMeasure", "type",
+    "armSkuName", "reservationTerm",
+})
+
+# CLI operator -> operator name (the text ones are index.html's applyOp names)
+OPERATORS = {
+    "!=": "notequal", "!~": "notcontains", "^=": "startswith", "$=": "endswith", "<=": "le", ">=": "ge",
+    "=": "equals", "~": "contains", "<": "lt", ">": "gt",
+}
+ORDERING = frozenset({"lt", "le", "gt", "ge"})
+WHERE_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*(" + "|".join(re.escape(op) for op in OPERATORS) + r")\s*(.*?)\s*$")
+AGG_RE = re.compile(r"^\s*(count|min|max|sum|avg|distinct)\s*(?:\(\s*([A-Za-z_]\w*)\s*\))?\s*$")
+# What collation_key strips and splits on (the same expressions as index.html's textRuns())
+COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+TEXT_RUNS = re.compile("[0-9]+|[^0-9]+")
+
+
+def number_text(value: float) -> str:
+    """A number spelled the way JavaScript's String(number) spells it.
+
+    Both use the shortest digits that round-trip, but JavaScript only switches
+    to an exponent below 1e-6 or from 1e21 on: 0.00002 (Python: 2e-05), 1e-7,
+    100 (not 100.0), 1e+21.
+    """
+    if value != value:
+        return "NaN"
+    if value in (math.inf, -math.inf):
+        return "Infinity" if value > 0 else "-Infinity"
+    if value == 0:
+        return "0"
+    sign = "-" if value < 0 else ""
+    mantissa, _, exponent = f"{abs(value)!r}".partition("e")
+    whole, _, fraction = mantissa.partition(".")
+    digits = (whole + fraction).lstrip("0")
+    # value = 0.DIGITS * 10**point
+    point = len(whole) + int(exponent or 0) - (len(whole + fraction) - len(digits))
+    digits = digits.rstrip("0")
+    if len(digits) <= point <= 21:
+        return sign + digits + "0" * (point - len(digits))
+    if 0 < point <= 21:
+        return sign + digits[:point] + "." + digits[point:]
+    if -6 < point <= 0:
+        return sign + "0." + "0" * -point + digits
+    head = digits[0] + ("." + digits[1:] if len(digits) > 1 else "")
+    return f"{sign}{head}e{'+' if point > 0 else '-'}{abs(point - 1)}"
+
+
+def as_text(value) -> str:
+    """A field value as the explorer's filters see it (JavaScript's toString)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return number_text(float(value))
+    return str(value)
+
+
+def as_number(value) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+@dataclass
+class Predicate:
+    """One filter on a field. `op` is an OPERATORS name, or "in" for an exact value set."""
+
+    field: str
+    op: str
+    value: str = ""
+    values: frozenset[str] = frozenset()
+
+    def __post_init__(self) -> None:
+        self._lower = self.value.lower()
+        self._number = as_number(self.value) if self.op in ORDERING else None
+
+    def matches(self, record: dict) -> bool:
+        cell = record.get(self.field)
+        if self.op == "in":
+            return as_text(cell) in self.values
+        if self.value == "":
+            # Like the explorer, an empty filter value filters nothing
+            return True
+        if self.op in ORDERING:
+            if cell is None:
+                return False
+            number = as_number(cell) if not isinstance(cell, str) else None
+            if number is not None and self._number is not None:
+                left, right = number, self._number
+            else:
+                left, right = as_text(cell)[: len(self.value)], self.value
+            if self.op == "lt":
+                return left < right
+            if self.op == "le":
+                return left <= right
+            if self.op == "gt":
+                return left > right
+            return left >= right
+        text = as_text(cell).lower()
+        if self.op == "contains":
+            return self._lower in text
+        if self.op == "notcontains":
+            return self._lower not in text
+        if self.op == "equals":
+            return text == self._lower
+        if self.op == "notequal":
+            return text != self._lower
+        if self.op == "startswith":
+            return text.startswith(self._lower)
+        if self.op == "endswith":
+            return text.endswith(self._lower)
+        return True
+
+    @property
+    def needle(self) -> bytes | None:
+        """Lower-cased bytes every matching raw line must contain, if that can be known."""
+        if self.op not in ("equals", "contains", "startswith", "endswith") or not self.value:
+            return None
+        if not (self.value.isascii() and self.value.isprintable()) or '"' in self.value or "\\" in self.value:
+            return None
+        if self.field not in STRING_FIELDS and not self.value.isalpha():
+            # A number's raw JSON (2e-05) need not contain the text the filter sees (0.00002)
+            return None
+        needle = self._lower.encode("ascii")
+        if self.field in STRING_FIELDS:
+            # The value is a JSON string, so its quotes anchor equals / starts / ends
+            if self.op in ("equals", "startswith"):
+                needle = b'"' + needle
+            if self.op in ("equals", "endswith"):
+                needle = needle + b'"'
+        return needle
+
+    @property
+    def prunes_files(self) -> bool:
+        """Whether a date file's name (YYYY-MM-DD) decides this filter for all its records."""
+        return self.field == DATE_FIELD and len(self.value) <= 10 and (self.op in ORDERING or self.op == "startswith")
+
+
+def parse_where(expr: str) -> Predicate:
+    match = WHERE_RE.match(expr)
+    if not match:
+        raise ValueError(f"cannot parse filter {expr!r}; expected FIELD OP VALUE with OP one of {' '.join(OPERATORS)}")
+    name, op, value = match.groups()
+    return Predicate(name, OPERATORS[op], value)
+
+
+@dataclass
+class Aggregate:
+    func: str
+    field: str | None = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.func}({self.field})" if self.field else self.func
+
+
+def parse_aggregates(spec: str) -> list[Aggregate]:
+    aggregates = []
+    for part in re.split(r",(?![^()]*\))", spec):
+        match = AGG_RE.match(part)
+        if not match or (match.group(1) != "count" and not match.group(2)):
+            raise ValueError(f"cannot parse aggregate {part.strip()!r}; expected count or min|max|sum|avg|distinct(FIELD)")
+        aggregates.append(Aggregate(match.group(1), match.group(2)))
+    return aggregates
+
+
+class Accumulator:
+    """Running state of one aggregate for one group."""
+
+    __slots__ = ("agg", "count", "total", "low", "high", "seen")
+
+    def __init__(self, agg: Aggregate):
+        self.agg = agg
+        self.count = 0
+        self.total = 0.0
+        self.low: float | None = None
+        self.high: float | None = None
+        self.seen: set[str] | None = set() if agg.func == "distinct" else None
+
+    def add(self, record: dict) -> None:
+        if self.agg.field is None:
+            self.count += 1
+            return
+        value = record.get(self.agg.field)
+        if value is None:
+            return
+        if self.seen is not None:
+            self.seen.add(as_text(value))
+            return
+        if self.agg.func == "count":
+            self.count += 1
+            return
+        number = as_number(value)
+        if number is None:
+            return
+        self.count += 1
+        self.total += number
+        if self.low is None or number < self.low:
+            self.low = number
+        if self.high is None or number > self.high:
+            self.high = number
+
+    def result(self):
+        func = self.agg.func
+        if func == "count":
+            return self.count
+        if func == "distinct":
+            return len(self.seen)
+        if func == "sum":
+            return self.total
+        if func == "avg":
+            return self.total / self.count if self.count else None
+        return self.low if func == "min" else self.high
+
+
+@dataclass
+class QueryStats:
+    files: int = 0
+    lines: int = 0
+    skipped_raw: int = 0
+    parsed: int = 0
+    matched: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} files, {self.lines:,} lines, {self.skipped_raw:,} skipped before parsing, "
+            f"{self.parsed:,} parsed, {self.matched:,} matched in {time.perf_counter() - self.started:.3f}s"
+        )
+
+
+def source_files(source: Path, predicates: list[Predicate]) -> list[Path]:
+    """The files to read; a directory of date files is pruned by name."""
+    if not source.is_dir():
+        return [source]
+    date_filters = [p for p in predicates if p.prunes_files]
+    files = []
+    for path in sorted(source.glob("*.ndjson")):
+        if DATE_FILE.match(path.stem):
+            if all(p.matches({DATE_FIELD: path.stem}) for p in date_filters):
+                files.append(path)
+        elif not any(p.field == DATE_FIELD for p in predicates):
+            # unknown.ndjson holds the records without a date
+            files.append(path)
+    return files
+
+
+def raw_line_filter(predicates: Iterable[Predicate]) -> Callable[[bytes], bool] | None:
+    """A cheap check on the undecoded line: False means no record on it can match."""
+    needles = [n for n in (p.needle for p in predicates) if n]
+    if not needles:
+        return None
+
+    def may_match(line: bytes) -> bool:
+        if not line.isascii() or b"\\" in line:
+            return True
+        lowered = line.lower()
+        return all(n in lowered for n in needles)
+
+    return may_match
+
+
+def iter_records(
+    files: Iterable[Path],
+    predicates: list[Predicate],
+    fields: Iterable[str] | None = None,
+    stats: QueryStats | None = None,
+) -> Iterator[dict]:
+    """Yield the records matching every predicate, projected onto `fields` (None keeps all)."""
+    stats = stats or QueryStats()
+    may_match = raw_line_filter(predicates)
+    keep = tuple(fields) if fields is not None else None
+    loads = json.loads
+    for path in files:
+        stats.files += 1
+        with open(path, "rb") as f:
+            for line in f:
+                stats.lines += 1
+                if may_match is not None and not may_match(line):
+                    stats.skipped_raw += 1
+                    continue
+                if not line.strip():
+                    continue
+                record = loads(line)
+                stats.parsed += 1
+                for p in predicates:
+                    if not p.matches(record):
+                        break
+                else:
+                    stats.matched += 1
+                    yield record if keep is None else {k: record.get(k) for k in keep}
+
+
+def group_rows(records: Iterable[dict], group_by: list[str], aggregates: list[Aggregate]) -> list[dict]:
+    groups: dict[tuple, list[Accumulator]] = {}
+    for record in records:
+        key = tuple(as_text(record.get(k)) for k in group_by)
+        accs = groups.get(key)
+        if accs is None:
+            accs = groups[key] = [Accumulator(a) for a in aggregates]
+        for acc in accs:
+            acc.add(record)
+    return [
+        {**dict(zip(group_by, key)), **{acc.agg.label: acc.result() for acc in accs}}
+        for key, accs in groups.items()
+    ]
+
+
+def collation_key(value) -> tuple:
+    """Sort key for one value; the explorer's sort order, in price_query, price_server and index.html.
+
+    Numbers sort by value, before any text. Text (and true/false) is compared
+    run by run: runs of digits by their value ("GPT-4" < "GPT-10"), everything
+    else ignoring case and accents ("Éclair" == "eclair"). ISO dates therefore
+    sort chronologically. Values that compare equal keep the data's order, and
+    missing values come last in both directions (see order_rows).
+    index.html's compareCells() implements the same rules.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, float(value))
+    text = COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", as_text(value))).lower()
+    runs = []
+    for run in TEXT_RUNS.findall(text):
+        if run[0] in "0123456789":
+            digits = run.lstrip("0")
+            runs.append((0, len(digits), digits))
+        else:
+            runs.append((1, run))
+    return (1, tuple(runs))
+
+
+def order_rows(rows: Iterable[dict], key: str, descending: bool, limit: int | None) -> list[dict]:
+    """Sort rows by one column in collation_key order, stably and with missing values last; keep the top `limit`."""
+    if descending:
+        def sort_key(row):
+            value = row.get(key)
+            return (value is not None, collation_key(value))
+        return heapq.nlargest(limit, rows, key=sort_key) if limit else sorted(rows, key=sort_key, reverse=True)
+
+    def sort_key(row):
+        value = row.get(key)
+        return (value is None, collation_key(value))
+    return heapq.nsmallest(limit, rows, key=sort_key) if limit else sorted(rows, key=sort_key)
+
+
+def parse_sort(spec: str) -> tuple[str, bool]:
+    """KEY or KEY:asc|desc, as in the explorer's sort= parameter."""
+    key, _, direction = spec.rpartition(":") if spec.endswith((":asc", ":desc")) else (spec, "", "asc")
+    return key, direction == "desc"
+
+
+def write_rows(rows: Iterable[dict], columns: list[str] | None, fmt: str, out=sys.stdout) -> int:
+    """Write rows in `fmt`, limited to `columns` (None: every field of each row)."""
+    count = 0
+    if columns is not None and fmt in ("json", "ndjson"):
+        rows = ({c: row.get(c) for c in columns} for row in rows)
+    if fmt == "ndjson":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+    if fmt == "csv":
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=columns or list(row), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+        return count
+    rows = list(rows)
+    if fmt == "json":
+        out.write(json.dumps(rows, indent=2, ensure_ascii=False) + "\n")
+        return len(rows)
+    columns = columns or (list(rows[0]) if rows else [])
+    # Exact values, spelled as the explorer's filters see them (354.83871, 0.00002)
+    cells = [[as_text(row.get(c)) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    out.write("  ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip() + "\n")
+    for r in cells:
+        out.write("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip() + "\n")
+    return len(rows)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Filter, group and aggregate the downloaded Azure price data.")
+    p.add_argument(
+        "--source",
+        help=f"prices NDJSON file or a directory of YYYY-MM-DD.ndjson files (default {DEFAULT_SOURCE.name}, or monthly/full if it is missing)",
+    )
+    p.add_argument("--where", action="append", default=[], metavar="FILTER", help="FIELD OP VALUE, e.g. 'meterName~Batch' or 'unitPrice<=2' (repeatable)")
+    p.add_argument("--since", help=f"Only records with {DATE_FIELD} on or after this date (YYYY-MM-DD)")
+    p.add_argument("--until", help=f"Only records with {DATE_FIELD} on or before this date (YYYY-MM-DD, or YYYY-MM for the whole month)")
+    p.add_argument("--group-by", help="Comma-separated fields to group by")
+    p.add_argument("--agg", help="Comma-separated aggregates, e.g. 'min(unitPrice),count' (default count when grouping)")
+    p.add_argument("--select", help=f"Comma-separated fields to list, or * for all (default {','.join(DEFAULT_FIELDS)})")
+    p.add_argument("--sort", help="Column (a field or an aggregate label such as min(unitPrice)), optionally :asc or :desc")
+    p.add_argument("--limit", type=int, help="Return at most this many rows")
+    p.add_argument("--format", choices=("table", "json", "ndjson", "csv"), default="table", help="Output format (default table)")
+    p.add_argument("--stats", action="store_true", help="Print how many lines were read, skipped before parsing and matched to stderr")
+    args = p.parse_args(argv)
+    try:
+        args.predicates = [parse_where(w) for w in args.where]
+        args.aggregates = parse_aggregates(args.agg) if args.agg else []
+    except ValueError as e:
+        p.error(str(e))
+    if args.since:
+        args.predicates.append(Predicate(DATE_FIELD, "ge", args.since))
+    if args.until:
+        args.predicates.append(Predicate(DATE_FIELD, "le", args.until))
+    args.group_by = [f.strip() for f in args.group_by.split(",") if f.strip()] if args.group_by else []
+    if args.group_by and not args.aggregates:
+        args.aggregates = [Aggregate("count")]
+    if args.select and (args.group_by or args.aggregates):
+        p.error("--select lists records; with --group-by/--agg the columns are the groups and aggregates")
+    if args.sort and args.aggregates:
+        labels = args.group_by + [a.label for a in args.aggregates]
+        if parse_sort(args.sort)[0] not in labels:
+            p.error(f"with --group-by/--agg, --sort takes one of {', '.join(labels)}")
+    return args
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.source:
+        source = Path(args.source)
+    else:
+        source = DEFAULT_SOURCE if DEFAULT_SOURCE.exists() else FALLBACK_SOURCE
+    if not source.exists():
+        print(f"{source} not found; run meter-download.py first or pass --source", file=sys.stderr)
+        return 1
+
+    stats = QueryStats()
+    files = source_files(source, args.predicates)
+    if args.aggregates:
+        needed = set(args.group_by) | {a.field for a in args.aggregates if a.field}
+        rows: Iterable[dict] = group_rows(iter_records(files, args.predicates, needed, stats), args.group_by, args.aggregates)
+        columns = args.group_by + [a.label for a in args.aggregates]
+    else:
+        columns = None if args.select == "*" else [f.strip() for f in (args.select or ",".join(DEFAULT_FIELDS)).split(",") if f.strip()]
+        fields = columns
+        if columns is not None and args.sort and parse_sort(args.sort)[0] not in columns:
+            # Keep the sort key through the projection; write_rows still prints only `columns`
+            fields = columns + [parse_sort(args.sort)[0]]
+        rows = iter_records(files, args.predicates, fields, stats)
+
+    if args.sort:
+        key, descending = parse_sort(args.sort)
+        rows = order_rows(rows, key, descending, args.limit)
+    elif args.limit:
+        rows = itertools.islice(rows, args.limit)
+
+    count = write_rows(rows, columns, args.format)
+    if args.stats:
+        print(f"{count} rows; {stats.summary()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Local price-explorer server: the static site plus a JSON query API.
+
+The explorer (index.html) normally downloads prices.ndjson and filters it in
+the browser. Served by this script, it asks the server for the one page it
+displays instead:
+
+  python price_server.py                          # http://127.0.0.1:8000/
+  python price_server.py --source monthly/full --port 8080 --reload-interval 60
+
+Endpoints:
+
+  GET /api/info               record count, data version, source
+  GET /api/prices?...         one page of matching rows, with the explorer's URL
+                              parameters: f_<col>=<op>:<value>, s_<col>=v1,v2,
+                              sort=<col>:asc|desc, page, pageSize
+  GET /api/values?column=COL  distinct values of a column (the filter menu's list)
+  GET /<path>                 static files from --root, with ETag / If-None-Match
+                              and single byte-range (Range / If-Range) support
+
+Filters follow index.html's applyOp semantics (see price_query.Predicate),
+and rows sort in the order its applySort() gives, ties in source order (see
+price_query.collation_key), so every page matches the static explorer's.
+Unknown columns are ignored, as parseURLParams() does.
+
+The data is held in segments, one per effectiveStartDate (one per file for a
+directory source). Each segment builds its per-column indexes on first use:
+lower-cased values for the text operators, value -> rows maps for s_
+selections and equals, and sort keys. A filter on effectiveStartDate skips whole segments.
+The sorted result of a query is cached, so paging through it only slices.
+
+Every --reload-interval seconds the source is checked. When it changed, it is
+re-read and only the segments whose lines changed are re-parsed and
+re-indexed; the rest are kept. The switch to the new data is atomic, and
+queries in flight finish on the old data.
+
+Binds to 127.0.0.1 by default; it is meant for internal deployments, not the
+public site. Files and directories starting with "." are never served.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from price_query import DATE_FIELD, DATE_FILE, Predicate, as_text, collation_key
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_SOURCE = BASE_DIR / "prices.ndjson"
+FALLBACK_SOURCE = BASE_DIR / "monthly" / "full"
+# The explorer's columns (index.html `columns`); other parameters are ignored
+COLUMNS = (
+    "productName", "meterName", "retailPrice", "unitPrice", "currencyCode", "unitOfMeasure", "armRegionName",
+    "location", "serviceName", "serviceFamily", "tierMinimumUnits", "effectiveStartDate", "meterId", "serviceId",
+    "productId", "skuId", "skuName", "type", "isPrimaryMeterRegion", "armSkuName",
+)
+# index.html applyOp's operators; for any other it filters nothing
+FILTER_OPS = frozenset({"contains", "notcontains", "equals", "notequal", "startswith", "endswith"})
+DEFAULT_SORT = ("effectiveStartDate", "desc")
+DEFAULT_PAGE_SIZE = 20
+RESULT_CACHE_SIZE = 32
+CHUNK_SIZE = 64 * 1024
+DATE_IN_LINE = re.compile(rb'"effectiveStartDate"\s*:\s*"(\d{4}-\d{2}-\d{2})')
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+mimetypes.add_type("application/x-ndjson", ".ndjson")
+mimetypes.add_type("text/markdown", ".md")
+
+
+class Segment:
+    """The records of one date (or one file), with lazily built per-column indexes."""
+
+    def __init__(self, key: str, digest: str, records: list[dict], positions: list[int]):
+        self.key = key
+        self.digest = digest
+        self.records = records
+        # Each record's line number in the whole source: results keep that order on sort ties
+        self.positions = positions
+        self._lower: dict[str, list[str]] = {}
+        self._exact: dict[str, dict[str, list[int]]] = {}
+        self._lower_exact: dict[str, dict[str, list[int]]] = {}
+        self._sort_keys: dict[str, list[tuple | None]] = {}
+
+    def moved(self, positions: list[int]) -> Segment:
+        """This segment at new line numbers (lines before it changed); records and indexes are shared."""
+        if positions == self.positions:
+            return self
+        segment = copy.copy(self)
+        segment.positions = positions
+        return segment
+
+    @property
+    def date(self) -> str | None:
+        return self.key if DATE_FILE.match(self.key) else None
+
+    def lower(self, column: str) -> list[str]:
+        values = self._lower.get(column)
+        if values is None:
+            values = self._lower[column] = [as_text(r.get(column)).lower() for r in self.records]
+        return values
+
+    def exact(self, column: str) -> dict[str, list[int]]:
+        index = self._exact.get(column)
+        if index is None:
+            index = defaultdict(list)
+            for i, r in enumerate(self.records):
+                index[as_text(r.get(column))].append(i)
+            index = self._exact[column] = dict(index)
+        return index
+
+    def lower_exact(self, column: str) -> dict[str, list[int]]:
+        index = self._lower_exact.get(column)
+        if index is None:
+            index = defaultdict(list)
+            for i, value in enumerate(self.lower(column)):
+                index[value].append(i)
+            index = self._lower_exact[column] = dict(index)
+        return index
+
+    def sort_keys(self, column: str) -> list[tuple | None]:
+        """Each record's collation_key for the column; None where the value is missing."""
+        keys = self._sort_keys.get(column)
+        if keys is None:
+            keys = self._sort_keys[column] = [
+                None if (value := r.get(column)) is None else collation_key(value) for r in self.records
+            ]
+        return keys
+
+    def select(self, predicates: list[Predicate]) -> list[int]:
+        """Row numbers matching every predicate: index lookups first, then scans of the survivors."""
+        rows: set[int] | None = None
+        scans = []
+        for p in predicates:
+            if p.op == "in":
+                index = self.exact(p.field)
+                found = {i for v in p.values for i in index.get(v, ())}
+            elif p.op == "equals":
+                found = set(self.lower_exact(p.field).get(p.value.lower(), ()))
+            else:
+                scans.append(p)
+                continue
+            rows = found if rows is None else rows & found
+            if not rows:
+                return []
+        ids = sorted(rows) if rows is not None else range(len(self.records))
+        for p in scans:
+            needle = p.value.lower()
+            if p.op in ("contains", "notcontains", "startswith", "endswith"):
+                low = self.lower(p.field)
+                if p.op == "contains":
+                    ids = [i for i in ids if needle in low[i]]
+                elif p.op == "notcontains":
+                    ids = [i for i in ids if needle not in low[i]]
+                elif p.op == "startswith":
+                    ids = [i for i in ids if low[i].startswith(needle)]
+                else:
+                    ids = [i for i in ids if low[i].endswith(needle)]
+            else:
+                ids = [i for i in ids if p.matches(self.records[i])]
+        return list(ids)
+
+
+def parse_query(params: list[tuple[str, str]]) -> tuple[list[Predicate], tuple[str, str], int, int]:
+    """The explorer's URL parameters -> (predicates, sort, page, page size), as parseURLParams() reads them."""
+    predicates = []
+    sort = DEFAULT_SORT
+    page, page_size = 1, DEFAULT_PAGE_SIZE
+    for key, value in params:
+        if key.startswith("f_") and key[2:] in COLUMNS:
+            op, sep, text = value.partition(":")
+            # Like applyOp, an empty value or unknown operator filters nothing
+            if sep and op in FILTER_OPS and text:
+                predicates.append(Predicate(key[2:], op, text))
+        elif key.startswith("s_") and key[2:] in COLUMNS:
+            predicates.append(Predicate(key[2:], "in", values=frozenset(v for v in value.split(",") if v.strip())))
+        elif key == "sort":
+            column, _, direction = value.partition(":")
+            if column in COLUMNS and direction in ("asc", "desc"):
+                sort = (column, direction)
+        elif key == "page" and value.isdigit() and int(value) > 0:
+            page = int(value)
+        elif key == "pageSize" and value.isdigit() and int(value) > 0:
+            page_size = int(value)
+    return predicates, sort, page, page_size
+
+
+class PriceStore:
+    """In-memory price data split into segments, reloadable in place."""
+
+    def __init__(self, source: Path):
+        self.source = source
+        self.segments: dict[str, Segment] = {}
+        self.version = 0
+        self.loaded_at = ""
+        self._stamp = None
+        self._cache: OrderedDict[tuple, tuple[list[dict], int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return sum(len(s.records) for s in self.segments.values())
+
+    def snapshot(self) -> tuple[dict[str, Segment], int]:
+        """The segments and the version they belong to, read together."""
+        with self._lock:
+            return self.segments, self.version
+
+    def info(self) -> dict:
+        with self._lock:
+            segments, version, loaded_at = self.segments, self.version, self.loaded_at
+        count = sum(len(s.records) for s in segments.values())
+        return {"count": count, "version": version, "loaded": loaded_at, "source": str(self.source)}
+
+    def _file_stamp(self, path: Path) -> str:
+        st = path.stat()
+        return f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+    def _source_stamp(self):
+        if self.source.is_dir():
+            return tuple((p.name, self._file_stamp(p)) for p in sorted(self.source.glob("*.ndjson")))
+        return self._file_stamp(self.source)
+
+    def refresh(self) -> str | None:
+        """Reload if the source changed; return a summary of what was rebuilt, or None."""
+        with self._reload_lock:
+            stamp = self._source_stamp()
+            if stamp == self._stamp:
+                return None
+            t0 = time.perf_counter()
+            old = self.segments
+            if self.source.is_dir():
+                new = self._load_directory(old)
+            else:
+                new = self._load_file(old)
+            rebuilt = sum(1 for k, s in new.items() if k not in old or old[k].records is not s.records)
+            with self._lock:
+                self.segments = new
+                self.version += 1
+                self.loaded_at = formatdate(usegmt=True)
+                self._cache.clear()
+            self._stamp = stamp
+            return (
+                f"{self.count:,} records in {len(new)} segments "
+                f"({rebuilt} rebuilt, {len(new) - rebuilt} kept) in {time.perf_counter() - t0:.2f}s"
+            )
+
+    def _load_directory(self, old: dict[str, Segment]) -> dict[str, Segment]:
+        new = {}
+        start = 0
+        for path in sorted(self.source.glob("*.ndjson")):
+            digest = self._file_stamp(path)
+            segment = old.get(path.stem)
+            if segment is None or segment.digest != digest:
+                with open(path, "rb") as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+                segment = Segment(path.stem, digest, records, list(range(start, start + len(records))))
+            else:
+                segment = segment.moved(list(range(start, start + len(segment.records))))
+            new[path.stem] = segment
+            start += len(segment.records)
+        return new
+
+    def _load_file(self, old: dict[str, Segment]) -> dict[str, Segment]:
+        # Group raw lines by date first; only dates whose lines changed are parsed
+        lines: dict[str, list[bytes]] = defaultdict(list)
+        positions: dict[str, list[int]] = defaultdict(list)
+        with open(self.source, "rb") as f:
+            for number, line in enumerate(f):
+                if line.strip():
+                    match = DATE_IN_LINE.search(line)
+                    key = match.group(1).decode("ascii") if match else "unknown"
+                    lines[key].append(line)
+                    positions[key].append(number)
+        new = {}
+        for key, group in lines.items():
+            digest = hashlib.sha1(b"".join(group)).hexdigest()
+            segment = old.get(key)
+            if segment is None or segment.digest != digest:
+                segment = Segment(key, digest, [json.loads(line) for line in group], positions[key])
+            else:
+                segment = segment.moved(positions[key])
+            new[key] = segment
+        return new
+
+    def matching(self, predicates: list[Predicate], sort: tuple[str, str]) -> tuple[list[dict], int, int]:
+        """All rows matching the predicates, sorted, with the data version and its record count; cached per version."""
+        key = (tuple((p.field, p.op, p.value, tuple(sorted(p.values))) for p in predicates), sort)
+        with self._lock:
+            segments, version = self.segments, self.version
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached[0], version, cached[1]
+        count = sum(len(s.records) for s in segments.values())
+        prunable = [p for p in predicates if p.prunes_files]
+        hits = []
+        for segment in segments.values():
+            date = segment.date
+            if prunable and (date is None or not all(p.matches({DATE_FIELD: date}) for p in prunable)):
+                continue
+            records, positions, keys = segment.records, segment.positions, segment.sort_keys(sort[0])
+            hits.extend((positions[i], keys[i], records[i]) for i in segment.select(predicates))
+        # Back into source order first: the sort is stable, and the explorer sorts the rows in file order.
+        # Then as price_query.order_rows does, with missing values last in both directions
+        hits.sort(key=lambda hit: hit[0])
+        if sort[1] == "desc":
+            hits.sort(key=lambda hit: (hit[1] is not None, hit[1] or ()), reverse=True)
+        else:
+            hits.sort(key=lambda hit: (hit[1] is None, hit[1] or ()))
+        rows = [record for _, _, record in hits]
+        with self._lock:
+            if version == self.version:
+                self._cache[key] = (rows, count)
+                while len(self._cache) > RESULT_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return rows, version, count
+
+    def query(self, params: list[tuple[str, str]]) -> dict:
+        predicates, sort, page, page_size = parse_query(params)
+        rows, version, count = self.matching(predicates, sort)
+        pages = max(1, -(-len(rows) // page_size))
+        page = min(page, pages)
+        start = (page - 1) * page_size
+        return {
+            "version": version,
+            "count": count,
+            "total": len(rows),
+            "page": page,
+            "pageSize": page_size,
+            "pages": pages,
+            "sort": f"{sort[0]}:{sort[1]}",
+            "rows": rows[start:start + page_size],
+        }
+
+    def distinct(self, column: str) -> tuple[list[str], int]:
+        """A column's distinct values in collation order, and the data version they come from."""
+        segments, version = self.snapshot()
+        values = set()
+        for segment in segments.values():
+            values.update(segment.exact(column))
+        return sorted(values, key=lambda v: (collation_key(v), v)), version
+
+
+class ExplorerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PriceExplorer/1.0"
+    store: PriceStore
+    root: Path
+    quiet = False
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def do_HEAD(self) -> None:
+        self.do_GET(head=True)
+
+    def do_GET(self, head: bool = False) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        if path.startswith("/api/"):
+            self.handle_api(path, parse_qsl(url.query, keep_blank_values=True), head)
+        else:
+            self.handle_static(path, head)
+
+    # --- API ---------------------------------------------------------------
+
+    def handle_api(self, path: str, params: list[tuple[str, str]], head: bool) -> None:
+        store = self.store
+        if path == "/api/info":
+            body = store.info()
+        elif path == "/api/prices":
+            body = store.query(params)
+        elif path == "/api/values":
+            column = dict(params).get("column", "")
+            if column not in COLUMNS:
+                self.send_json({"error": f"unknown column {column!r}"}, HTTPStatus.BAD_REQUEST, head=head)
+                return
+            values, version = store.distinct(column)
+            body = {"column": column, "version": version, "values": values}
+        else:
+            self.send_json({"error": "not found"}, HTTPStatus.NOT_FOUND, head=head)
+            return
+        query = "&".join(f"{k}={v}" for k, v in params)
+        # The version the body was built from: a reload since then must not relabel it
+        version = body["version"]
+        etag = f'"v{version}-{hashlib.sha1(f"{path}?{query}".encode("utf-8")).hexdigest()[:16]}"'
+        if self.not_modified(etag):
+            return
+        self.send_json(body, etag=etag, head=head)
+
+    def send_json(self, body: dict, status: HTTPStatus = HTTPStatus.OK, etag: str | None = None, head: bool = False) -> None:
+        data = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+    # --- Static files ------------------------------------------------------
+
+    def resolve(self, path: str) -> Path | None:
+        parts = [p for p in path.split("/") if p]
+        if any(p.startswith(".") for p in parts):
+            return None
+        target = self.root.joinpath(*parts).resolve()
+        if target != self.root and self.root not in target.parents:
+            return None
+        if target.is_dir():
+            target = target / "index.html"
+        return target if target.is_file() else None
+
+    def not_modified(self, etag: str) -> bool:
+        tags = self.headers.get("If-None-Match")
+        if tags and (tags.strip() == "*" or etag in [t.strip() for t in tags.split(",")]):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        return False
+
+    def byte_range(self, size: int, etag: str) -> tuple[int, int] | None | bool:
+        """The requested (start, end) range; None for the whole file, False if unsatisfiable."""
+        header = self.headers.get("Range")
+        if not header:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range.strip() != etag:
+            return None
+        match = RANGE_RE.match(header.strip())
+        if not match or match.groups() == ("", ""):
+            # Multiple or malformed ranges: serving the whole file is allowed
+            return None
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            return False
+        return start, end
+
+    def handle_static(self, path: str, head: bool) -> None:
+        target = self.resolve(path)
+        if target is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        st = target.stat()
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        if self.not_modified(etag):
+            return
+        size = st.st_size
+        span = self.byte_range(size, etag)
+        if span is False:
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = span if span else (0, size - 1)
+        length = end - start + 1 if size else 0
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/json", "application/x-ndjson", "application/javascript"):
+            content_type += "; charset=utf-8"
+
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if span else HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(st.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        if span:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head or not length:
+            return
+        with open(target, "rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def watch(store: PriceStore, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            summary = store.refresh()
+        except (OSError, ValueError) as e:
+            # Keep serving the previous data (e.g. a file caught mid-write)
+            print(f"Reload failed, keeping version {store.version}: {e}", file=sys.stderr)
+            continue
+        if summary:
+            print(f"Reloaded version {store.version}: {summary}", file=sys.stderr)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Serve the price explorer with a JSON query API over in-memory indexes.")
+    p.add_argument("--source", help=f"prices NDJSON file or directory of date files (default {DEFAULT_SOURCE.name}, or monthly/full if it is missing)")
+    p.add_argument("--root", default=str(BASE_DIR), help="Directory of static files to serve (default: the repository)")
+    p.add_argument("--host", default="127.0.0.1", help="Address to bind (default 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8000, help="Port (default 8000)")
+    p.add_argument("--reload-interval", type=float, default=30.0, help="Seconds between checks for changed data; 0 disables (default 30)")
+    p.add_argument("--quiet", action="store_true", help="Do not log each request")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.source:
+        source = Path(args.source)
+    else:
+        source = DEFAULT_SOURCE if DEFAULT_SOURCE.exists() else FALLBACK_SOURCE
+    if not source.exists():
+        print(f"{source} not found; run meter-download.py first or pass --source", file=sys.stderr)
+        return 1
+
+    store = PriceStore(source)
+    print(f"Loaded {source}: {store.refresh()}")
+    ExplorerHandler.store = store
+    ExplorerHandler.root = Path(args.root).resolve()
+    ExplorerHandler.quiet = args.quiet
+    if args.reload_interval > 0:
+        threading.Thread(target=watch, args=(store, args.reload_interval), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), ExplorerHandler)
+    print(f"Serving {ExplorerHandler.root} on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
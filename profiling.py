@@ -0,0 +1,229 @@
+"""Shared --profile instrumentation for the pipeline scripts.
+
+Every entry point adds the flag with add_profile_argument(parser) and wraps
+its work in the profiler returned by profiler_from_args():
+
+    profiler = profiler_from_args("split_into_monthly", args)
+    with profiler:
+        with profiler.phase("load"):
+            items = load_local_prices(path)
+
+Without --profile the profiler does nothing. With it, the run is recorded by
+cProfile and tracemalloc, and a JSON report is written on exit (also when the
+script fails); by default to profiles/ in the repository. Threads started
+during the run (e.g. create-ai-summaries' summary workers) are profiled too,
+and their calls are merged into the one set of stats. The report has:
+
+ - wall and CPU seconds and peak RSS for the whole run and for each phase
+ - tracemalloc's peak traced memory per phase and its top allocating lines
+ - the top functions by cumulative time; the raw stats go to <report>.prof
+   (open with `python -m pstats` or snakeviz)
+ - how many threads the stats cover (null on Python 3.12+, where cProfile
+   sees every thread)
+
+cProfile and tracemalloc slow the run down, so compare profiled runs with
+each other, not with unprofiled timings:
+
+    python profiling.py compare profiles/split_into_monthly-A.json profiles/split_into_monthly-B.json
+
+Pure stdlib. Peak RSS is reported where the resource module exists (not on
+Windows).
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_DIR = Path(__file__).resolve().parent / "profiles"
+TOP_N = 25
+
+
+def peak_rss_mb() -> float | None:
+    """The process's peak resident set size so far, in MB; None without the resource module."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="REPORT",
+        help="Profile the run and write a JSON report to REPORT (default profiles/<script>-<UTC time>.json in the repository)",
+    )
+
+
+class Profiler:
+    """Collects per-phase timings and the run's cProfile / tracemalloc data."""
+
+    def __init__(self, script: str, report_path: str | None):
+        self.script = script
+        self.enabled = report_path is not None
+        self.report_path = Path(report_path) if report_path else None
+        self.phases: list[dict] = []
+        self._profile: cProfile.Profile | None = None
+        self._thread_profiles: list[cProfile.Profile] = []
+
+    def __enter__(self) -> "Profiler":
+        if not self.enabled:
+            return self
+        if self.report_path is None:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.report_path = PROFILE_DIR / f"{self.script}-{stamp}.json"
+        self._started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self._wall0, self._cpu0 = time.perf_counter(), time.process_time()
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        if sys.version_info < (3, 12):
+            # Before 3.12 a Profile only sees the thread that enabled it; give
+            # each thread started from now on its own (3.12+ sees all threads)
+            threading.setprofile(self._profile_thread)
+        self._profile.enable()
+        return self
+
+    def _profile_thread(self, frame, event, arg) -> None:
+        # Runs on the new thread's first event; enable() replaces this hook there
+        profile = cProfile.Profile()
+        self._thread_profiles.append(profile)
+        profile.enable()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named phase (load, group, write, filter, render, ...)."""
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "name": name,
+                "wall_seconds": round(time.perf_counter() - wall0, 4),
+                "cpu_seconds": round(time.process_time() - cpu0, 4),
+                "traced_peak_mb": round(tracemalloc.get_traced_memory()[1] / 1e6, 2),
+                "peak_rss_mb": peak_rss_mb(),
+            })
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not self.enabled:
+            return
+        self._profile.disable()
+        threading.setprofile(None)
+        wall = time.perf_counter() - self._wall0
+        cpu = time.process_time() - self._cpu0
+        # Read before the snapshot, which itself allocates a lot
+        rss = peak_rss_mb()
+        snapshot = tracemalloc.take_snapshot()
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        prof_path = self.report_path.with_suffix(".prof")
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        for profile in self._thread_profiles:
+            profile.create_stats()
+            if profile.stats:
+                stats.add(profile)
+        stats.dump_stats(str(prof_path))
+        report = {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started": self._started,
+            "status": "error" if exc_type else "ok",
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_rss_mb": rss,
+            "traced_peak_mb": round(traced_peak / 1e6, 2),
+            "phases": self.phases,
+            "top_allocations": [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:TOP_N]
+            ],
+            "threads": 1 + len(self._thread_profiles) if sys.version_info < (3, 12) else None,
+            "top_functions": top_functions(stats),
+            "cprofile_stats": str(prof_path),
+        }
+        self.report_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Profile written to {self.report_path} (cProfile stats: {prof_path})", file=sys.stderr)
+
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_N) -> list[dict]:
+    rows = []
+    for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.basename(filename)}:{lineno}({func})",
+            "ncalls": ncalls,
+            "tottime": round(tottime, 4),
+            "cumtime": round(cumtime, 4),
+        })
+    rows.sort(key=lambda r: r["cumtime"], reverse=True)
+    return rows[:limit]
+
+
+def profiler_from_args(script: str, args: argparse.Namespace) -> Profiler:
+    value = getattr(args, "profile", None)
+    return Profiler(script, None if value is None else value)
+
+
+def compare(before: dict, after: dict) -> str:
+    """Side-by-side phase table for two reports of the same script."""
+    lines = [f"{'phase':<14}{'wall before':>12}{'wall after':>12}{'change':>9}{'traced MB':>11}{'rss MB':>9}"]
+    before_phases = {p["name"]: p for p in before.get("phases", [])}
+    rows = after.get("phases", []) + [{"name": "total", **{k: after.get(k) for k in ("wall_seconds", "traced_peak_mb", "peak_rss_mb")}}]
+    for phase in rows:
+        base = before_phases.get(phase["name"]) if phase["name"] != "total" else before
+        old = base.get("wall_seconds") if base else None
+        new = phase["wall_seconds"]
+        change = f"{(new / old - 1) * 100:+.0f}%" if old else "-"
+        old_text = f"{old:.3f}" if old is not None else "-"
+        rss = phase.get("peak_rss_mb")
+        lines.append(
+            f"{phase['name']:<14}{old_text:>12}{new:>12.3f}{change:>9}{phase.get('traced_peak_mb') or 0:>11.1f}"
+            f"{rss if rss is not None else '-':>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Compare two --profile reports.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmp_parser = sub.add_parser("compare", help="Show per-phase wall time changes between two reports")
+    cmp_parser.add_argument("before")
+    cmp_parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    before = json.loads(Path(args.before).read_text(encoding="utf-8"))
+    after = json.loads(Path(args.after).read_text(encoding="utf-8"))
+    print(compare(before, after))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -25,6 +25,9 @@ import os
 from collections import defaultdict
 from typing import Dict, List
 
+from fileutil import write_if_changed
+from profiling import add_profile_argument, profiler_from_args
+
 
 def load_local_prices(path: str) -> List[Dict]:
     """Read items from a local NDJSON file."""
@@ -69,16 +72,21 @@ def safe_filename_from_date(date_str: str) -> str:
     return f"{date_only}.ndjson"
 
 
-def write_ndjson(groups: Dict[str, List[Dict]], output_dir: str) -> None:
-    """Write each group to a separate NDJSON file in output_dir."""
+def write_ndjson(groups: Dict[str, List[Dict]], output_dir: str) -> List[str]:
+    """Write each group to a separate NDJSON file in output_dir.
+
+    Returns the filenames whose content changed (new files included).
+    """
     os.makedirs(output_dir, exist_ok=True)
 
+    changed: List[str] = []
     for date_str, records in groups.items():
         filename = safe_filename_from_date(date_str)
         path = os.path.join(output_dir, filename)
-        with open(path, "w", encoding="utf-8") as f:
-            for record in records:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        text = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        if write_if_changed(path, text):
+            changed.append(filename)
+    return sorted(changed)
 
 
 FILTER_KEYS = (
@@ -89,22 +97,34 @@ FILTER_KEYS = (
 )
 
 
-def filter_ndjson_directory(src_dir: str, dest_dir: str, keys: tuple[str, ...] = FILTER_KEYS) -> None:
+def filter_ndjson_directory(
+    src_dir: str,
+    dest_dir: str,
+    keys: tuple[str, ...] = FILTER_KEYS,
+    only: List[str] | None = None,
+) -> List[str]:
     """Read each .ndjson in src_dir, keep only selected keys, dedupe, write to dest_dir.
 
     - Operates in a streaming fashion (line-by-line) for memory efficiency.
     - Skips lines that are not valid JSON objects.
     - Removes duplicate JSON lines after the filtered content has been read.
-    - Writes files with the same filenames into dest_dir.
+    - Writes files with the same filenames into dest_dir, leaving unchanged files untouched.
+    - `only` restricts the pass to those filenames (e.g. the ones write_ndjson changed).
+
+    Returns the filenames whose filtered content changed.
     """
     if not os.path.isdir(src_dir):
         print(f"Source directory does not exist or is not a directory: {src_dir}")
-        return
+        return []
 
     os.makedirs(dest_dir, exist_ok=True)
 
     files = [f for f in os.listdir(src_dir) if f.endswith(".ndjson")]
+    if only is not None:
+        wanted = set(only)
+        files = [f for f in files if f in wanted]
     files.sort()
+    changed: List[str] = []
     print(f"Filtering {len(files)} files from '{src_dir}' to '{dest_dir}'")
 
     for filename in files:
@@ -135,11 +155,13 @@ def filter_ndjson_directory(src_dir: str, dest_dir: str, keys: tuple[str, ...] =
                     continue
 
         # Write unique filtered lines
-        with open(dest_path, "w", encoding="utf-8") as w:
-            for s in unique_lines:
-                w.write(s + "\n")
+        if write_if_changed(dest_path, "".join(s + "\n" for s in unique_lines)):
+            changed.append(filename)
+            print(f"  Wrote {len(unique_lines)}/{total_count} unique records -> {dest_path}")
+        else:
+            print(f"  Unchanged ({len(unique_lines)}/{total_count} unique records) -> {dest_path}")
 
-        print(f"  Wrote {len(unique_lines)}/{total_count} unique records -> {dest_path}")
+    return changed
 
 
 
@@ -155,21 +177,28 @@ def main() -> None:
         "--out-dir", default="monthly/full",
         help="Directory for NDJSON files (default: ./monthly/full)"
     )
+    add_profile_argument(parser)
     args = parser.parse_args()
 
-    print(f"Loading local NDJSON file: {args.input}")
-    items = load_local_prices(args.input)
-    print(f"Loaded {len(items)} items")
-
-    groups = group_by_effective_date(items)
-    print(f"Grouping into {len(groups)} files based on effectiveStartDate")
-
-    write_ndjson(groups, args.out_dir)
-    print(f"NDJSON files written to '{args.out_dir}'")
-
-    # After writing full files, emit partial files with only selected keys
-    partial_dir = os.path.join(os.path.dirname(args.out_dir.rstrip(os.sep)), "partial")
-    filter_ndjson_directory(args.out_dir, partial_dir, FILTER_KEYS)
+    profiler = profiler_from_args("split_into_monthly", args)
+    with profiler:
+        print(f"Loading local NDJSON file: {args.input}")
+        with profiler.phase("load"):
+            items = load_local_prices(args.input)
+        print(f"Loaded {len(items)} items")
+
+        with profiler.phase("group"):
+            groups = group_by_effective_date(items)
+        print(f"Grouping into {len(groups)} files based on effectiveStartDate")
+
+        with profiler.phase("write"):
+            changed = write_ndjson(groups, args.out_dir)
+        print(f"NDJSON files written to '{args.out_dir}' ({len(changed)} changed)")
+
+        # After writing full files, emit partial files with only selected keys
+        partial_dir = os.path.join(os.path.dirname(args.out_dir.rstrip(os.sep)), "partial")
+        with profiler.phase("filter"):
+            filter_ndjson_directory(args.out_dir, partial_dir, FILTER_KEYS)
 
 
 if __name__ == "__main__":
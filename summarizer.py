@@ -0,0 +1,475 @@
+"""Importable AI summary generation for monthly/partial price files.
+
+ai-summary.py is a thin CLI wrapper over this module, and create-ai-summaries.py
+imports it directly so a batch run can share one LLM backend (its HTTP
+connection pools and rate limiters, see llm_backend.py) across many dates
+instead of spawning a process per date.
+
+Failures are raised as SummaryError carrying the exit code ai-summary.py has
+always used, so both the single-date CLI and the batch runner report them the
+same way.
+
+Each generated summary is recorded in monthly/summary-cache.json under a key
+hashed from the partial NDJSON content, the system message, the model name and
+the tool configuration. A date is regenerated only when its summary is missing
+or one of those inputs has changed since it was written.
+
+Partial files larger than the chunk token budget are summarised map-reduce
+style: records are packed into chunks by productName, the chunks are
+summarised in parallel, and one final call merges them into the usual
+per-provider format. Their cache entries also hash the map and reduce prompts
+and the chunk budget, so changing any of those rebuilds them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from compact_encoding import FORMAT_NOTE, encode
+from llm_backend import BackendConfigError, Completion, LLMError, backend_from_env, configured_providers
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARTIAL_DIR = os.path.join(BASE_DIR, "monthly", "partial")
+# Overridable so benchmarks and dry runs against a stand-in server never touch the real archive
+AISUMMARY_DIR = os.getenv("AI_SUMMARY_OUTPUT_DIR", os.path.join(BASE_DIR, "monthly", "aisummary"))
+CACHE_PATH = os.getenv("AI_SUMMARY_CACHE_PATH", os.path.join(BASE_DIR, "monthly", "summary-cache.json"))
+
+# Partial files above this many input tokens are split into chunks
+DEFAULT_CHUNK_TOKENS = int(os.getenv("AI_SUMMARY_CHUNK_TOKENS", "16000"))
+# Chunks summarised at once for a single date
+MAP_CONCURRENCY = 4
+# How partial records are sent to the model: "ndjson" (as stored) or "compact"
+DEFAULT_ENCODING = os.getenv("AI_SUMMARY_ENCODING", "ndjson")
+
+MCP_TOOLS = [
+    {
+        "type": "mcp",
+        "server_label": "MicrosoftLearn",
+        "server_url": "https://learn.microsoft.com/api/mcp",
+        "require_approval": "never",
+    },
+]
+
+# The output rules shared by the single-call prompt and the reduce step
+output_rules = """
+<output sections>
+
+A summary of the new Azure AI Foundry Model meters, grouped by model provider.
+
+After each model group, use the Microsoft Learn MCP tool to provide links to the documentation for each specific model family, or service mentioned.
+
+<pricing format>
+
+- All the prices are in USD
+- Do not round up or round down pricing
+- When there are multiple prices for the same model, don't quote the rage, just state from $xxxxx.
+- Aways quote the exact price listed
+
+<pricing format/>
+
+<common abbreviations>
+Reasoning
+Data Zone
+Batch
+Cached
+Input
+Output
+
+<common abbreviations>
+
+"""
+
+system_message = """
+
+<general instructions>
+You are a helpful AI assistant that summarises a price list file of new Azure AI Foundry Model meters, and provides a concise overview of the file. The file is provided in ndjson format. Stick to the facts. Do not include a title or preamble.  At the end of the document, state that prices vary depending on region.
+When summarising, group the models by model provider (using heading level 3), and try to summarise one model per bullet point.
+
+<general instructions/>
+""" + output_rules
+
+
+map_instructions = """
+You are given one part of a larger price list file of new Azure AI Foundry Model meters, in ndjson format.
+Summarise only the meters in this part, grouped by model provider (using heading level 3), one model per bullet point.
+Quote every price exactly as listed, in USD. Do not include a title, preamble or closing remarks, and do not add documentation links.
+"""
+
+reduce_instructions = """
+
+<general instructions>
+You are a helpful AI assistant that merges partial summaries of one price list file of new Azure AI Foundry Model meters into a single concise overview. The input is markdown: one "## Part N" section per part of the file, each listing the models in that part under provider headings (heading level 3), one model per bullet point, with exact USD prices.
+Combine the headings for the same model provider, merge or remove duplicate bullets, and keep every price exactly as written. Stick to the facts. Do not include a title or preamble.  At the end of the document, state that prices vary depending on region.
+
+<general instructions/>
+""" + output_rules
+
+
+class SummaryError(Exception):
+    """A summary could not be generated; exit_code matches ai-summary.py."""
+
+    def __init__(self, message: str, exit_code: int):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+@dataclass
+class SummaryResult:
+    date: str
+    status: str  # "generated", "skipped" or "failed"
+    output_path: str
+    elapsed: float = 0.0
+    error: str | None = None
+    exit_code: int = 0
+    reason: str | None = None
+    cache_entry: dict | None = None
+
+
+def parse_date(date: str) -> datetime:
+    try:
+        return datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise SummaryError("Error: --date must be in YYYY-MM-DD format (e.g., 2025-08-01).", 2)
+
+
+def input_path_for(date_str: str) -> str:
+    return os.path.join(PARTIAL_DIR, f"{date_str}.ndjson")
+
+
+def output_path_for(date_str: str) -> str:
+    return os.path.join(AISUMMARY_DIR, f"{date_str}.md")
+
+
+def _primary_provider():
+    """(provider class, model) that create_backend() would try first, or None; creates no client."""
+    try:
+        providers = configured_providers()
+    except BackendConfigError:
+        return None
+    return providers[0] if providers else None
+
+
+def configured_model() -> str:
+    """Model of the provider that would answer first, for cache keys; "" if none has credentials.
+
+    Uses the same credential checks as create_backend(), so it matches the
+    model that generate_summary() records when no failover happens.
+    """
+    primary = _primary_provider()
+    return primary[1] if primary else ""
+
+
+def configured_tools() -> list[dict] | None:
+    """The tools that provider would receive: MCP_TOOLS, or None if it drops tools."""
+    primary = _primary_provider()
+    return MCP_TOOLS if primary is None or primary[0].supports_tools else None
+
+
+def create_backend():
+    """Build the shared LLM backend from the environment.
+
+    The backend is safe to share between threads; doing so reuses its HTTP
+    connection pools and keeps every worker inside the same rate budgets.
+    """
+    try:
+        return backend_from_env()
+    except BackendConfigError as e:
+        raise SummaryError(
+            f"Error: {e}. Set AZURE_OPENAI_API_KEY, AZURE_OPENAI_V1_API_ENDPOINT, and AZURE_OPENAI_API_MODEL"
+            " (or GITHUB_TOKEN with AI_SUMMARY_PROVIDERS=github or azure,github).",
+            7,
+        )
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def instructions_for(base: str, encoding: str) -> str:
+    return base + FORMAT_NOTE if encoding == "compact" else base
+
+
+def is_chunked(content: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS) -> bool:
+    """Whether summarize_content() map-reduces this (encoded) content rather than sending it whole."""
+    return estimate_tokens(content) > chunk_tokens
+
+
+def chunking_for(content: str, chunk_tokens: int = DEFAULT_CHUNK_TOKENS, encoding: str = DEFAULT_ENCODING) -> str | None:
+    """Hash of the map-reduce prompts and chunk size that shape a chunked summary; None if not chunked."""
+    if not is_chunked(content, chunk_tokens):
+        return None
+    settings = {
+        "map": instructions_for(map_instructions, encoding),
+        "reduce": reduce_instructions,
+        "chunk_tokens": chunk_tokens,
+    }
+    return _sha256(json.dumps(settings, sort_keys=True))
+
+
+def cache_entry_for(
+    content: str,
+    model: str,
+    instructions: str = system_message,
+    tools: list[dict] | None = MCP_TOOLS,
+    chunking: str | None = None,
+) -> dict:
+    """Hash every input that affects a summary; "key" combines them all.
+
+    `content` and `instructions` are what is actually sent, so switching the
+    encoding invalidates the affected summaries. `model` and `tools` are those
+    of the provider that answered (tools is None when it dropped them).
+    `chunking` (see chunking_for) is only recorded for map-reduced summaries,
+    so the keys of the others do not depend on the map-reduce settings.
+    """
+    entry = {
+        "input": _sha256(content),
+        "prompt": _sha256(instructions),
+        "model": model,
+        "tools": _sha256(json.dumps(tools, sort_keys=True)),
+    }
+    if chunking is not None:
+        entry["chunking"] = chunking
+    entry["key"] = _sha256(json.dumps(entry, sort_keys=True))
+    return entry
+
+
+def load_cache(path: str = CACHE_PATH) -> dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: ignoring unreadable summary cache {path}: {e}")
+        return {}
+    return data.get("entries", {}) if isinstance(data, dict) else {}
+
+
+def save_cache(cache: dict[str, dict], path: str = CACHE_PATH) -> None:
+    """Write the cache atomically, sorted so diffs stay small in git."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"entries": dict(sorted(cache.items()))}, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def read_input(date_str: str) -> str:
+    input_path = input_path_for(date_str)
+    if not os.path.exists(input_path):
+        raise SummaryError(f"Error: input file not found: {input_path}", 3)
+    try:
+        with open(input_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception as e:
+        raise SummaryError(f"Error reading input file: {e}", 4)
+
+
+def stale_reason(date_str: str, entry: dict, cache: dict[str, dict] | None, force: bool = False) -> str | None:
+    """Return why <date_str> needs regenerating, or None if its summary is current.
+
+    A summary written before the cache existed has no entry; it is adopted as
+    current rather than paid for again (use --force to rebuild it).
+    """
+    if force:
+        return "forced"
+    if not os.path.exists(output_path_for(date_str)):
+        return "missing summary"
+    cached = (cache or {}).get(date_str)
+    if cached is None or cached.get("key") == entry["key"]:
+        return None
+    changed = [name for name in ("input", "prompt", "model", "tools", "chunking") if cached.get(name) != entry.get(name)]
+    return ", ".join(f"{name} changed" for name in changed) or "cache key changed"
+
+
+def entry_for_date(
+    date_str: str,
+    model: str,
+    encoding: str = DEFAULT_ENCODING,
+    tools: list[dict] | None = MCP_TOOLS,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+) -> dict:
+    content = encode(read_input(date_str), encoding)
+    return cache_entry_for(
+        content, model, instructions_for(system_message, encoding), tools, chunking_for(content, chunk_tokens, encoding)
+    )
+
+
+def needs_summary(
+    date_str: str,
+    model: str,
+    cache: dict[str, dict] | None = None,
+    force: bool = False,
+    encoding: str = DEFAULT_ENCODING,
+    tools: list[dict] | None = MCP_TOOLS,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+) -> str | None:
+    """Return the stale reason for <date_str>; raise if its input is missing."""
+    return stale_reason(date_str, entry_for_date(date_str, model, encoding, tools, chunk_tokens), cache, force)
+
+
+def _record_group(line: str) -> str:
+    try:
+        return str(json.loads(line).get("productName") or "")
+    except (json.JSONDecodeError, AttributeError):
+        return ""
+
+
+def plan_chunks(ndjson_content: str, token_budget: int = DEFAULT_CHUNK_TOKENS) -> list[str]:
+    """Split NDJSON into chunks under token_budget, keeping productName groups together.
+
+    Groups are packed largest-first into the first chunk with room. A group
+    that alone exceeds the budget is split across chunks by line. Returns a
+    single chunk (the original content) when everything fits.
+    """
+    if estimate_tokens(ndjson_content) <= token_budget:
+        return [ndjson_content]
+
+    groups: dict[str, list[str]] = defaultdict(list)
+    for line in ndjson_content.splitlines():
+        if line.strip():
+            groups[_record_group(line)].append(line)
+
+    pieces: list[tuple[int, list[str]]] = []
+    for lines in groups.values():
+        group_tokens = estimate_tokens("\n".join(lines))
+        if group_tokens <= token_budget:
+            pieces.append((group_tokens, lines))
+            continue
+        part: list[str] = []
+        part_tokens = 0
+        for line in lines:
+            line_tokens = estimate_tokens(line)
+            if part and part_tokens + line_tokens > token_budget:
+                pieces.append((part_tokens, part))
+                part, part_tokens = [], 0
+            part.append(line)
+            part_tokens += line_tokens
+        if part:
+            pieces.append((part_tokens, part))
+
+    chunks: list[tuple[int, list[str]]] = []
+    for piece_tokens, lines in sorted(pieces, key=lambda p: p[0], reverse=True):
+        for i, (chunk_tokens, chunk_lines) in enumerate(chunks):
+            if chunk_tokens + piece_tokens <= token_budget:
+                chunks[i] = (chunk_tokens + piece_tokens, chunk_lines + lines)
+                break
+        else:
+            chunks.append((piece_tokens, list(lines)))
+    return ["\n".join(lines) + "\n" for _, lines in chunks]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: tiktoken when installed, else ~4 characters per token."""
+    try:
+        import tiktoken
+    except ImportError:
+        return max(1, len(text) // 4)
+    return len(tiktoken.get_encoding("o200k_base").encode(text))
+
+
+def format_title(parsed_date: datetime) -> str:
+    # Use parsed components to avoid platform-specific %-d/%#d issues
+    return f"# {parsed_date.day} {parsed_date.strftime('%B %Y')}\n\n"
+
+
+def _create_response(backend, instructions: str, content: str, tools: list[dict] | None) -> Completion:
+    try:
+        return backend.complete(instructions, content, tools)
+    except LLMError as e:
+        raise SummaryError(f"Error from model API: {e}", 5)
+
+
+def summarize_content(
+    ndjson_content: str,
+    *,
+    backend,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    encoding: str = DEFAULT_ENCODING,
+) -> tuple[str, list[Completion]]:
+    """Return the summary text for one partial file and every completion it took, map-reducing oversized input.
+
+    With chunking, latency is roughly the slowest chunk plus the reduce call
+    rather than growing with the whole input. The last completion is the one
+    whose text is returned.
+    """
+    content = encode(ndjson_content, encoding)
+    if not is_chunked(content, chunk_tokens):
+        answer = _create_response(backend, instructions_for(system_message, encoding), content, MCP_TOOLS)
+        return answer.text, [answer]
+
+    chunks = plan_chunks(ndjson_content, chunk_tokens)
+    chunk_instructions = instructions_for(map_instructions, encoding)
+    with ThreadPoolExecutor(max_workers=min(MAP_CONCURRENCY, len(chunks))) as pool:
+        partials = list(pool.map(
+            lambda chunk: _create_response(backend, chunk_instructions, encode(chunk, encoding), None),
+            chunks,
+        ))
+    merged_input = "\n\n".join(f"## Part {i}\n\n{p.text}" for i, p in enumerate(partials, 1))
+    answer = _create_response(backend, reduce_instructions, merged_input, MCP_TOOLS)
+    return answer.text, partials + [answer]
+
+
+def generate_summary(
+    date: str,
+    *,
+    backend,
+    force: bool = False,
+    cache: dict[str, dict] | None = None,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    encoding: str = DEFAULT_ENCODING,
+) -> SummaryResult:
+    """Summarise monthly/partial/<date>.ndjson into monthly/aisummary/<date>.md.
+
+    Returns a SummaryResult with status "generated" or "skipped"; raises
+    SummaryError on any failure. The result carries the cache entry for the
+    caller to record; `cache` itself is only read here so concurrent callers
+    can share it.
+    """
+    parsed_date = parse_date(date)
+    date_str = parsed_date.strftime("%Y-%m-%d")
+    output_path = output_path_for(date_str)
+
+    ndjson_content = read_input(date_str)
+    encoded = encode(ndjson_content, encoding)
+    instructions = instructions_for(system_message, encoding)
+    chunking = chunking_for(encoded, chunk_tokens, encoding)
+    entry = cache_entry_for(encoded, backend.model, instructions, MCP_TOOLS if backend.supports_tools else None, chunking)
+    reason = stale_reason(date_str, entry, cache, force)
+    if reason is None:
+        return SummaryResult(date=date_str, status="skipped", output_path=output_path, cache_entry=entry)
+
+    t0 = time.perf_counter()
+    content, answers = summarize_content(
+        ndjson_content, backend=backend, chunk_tokens=chunk_tokens, encoding=encoding
+    )
+    # Record what actually answered: after a failover the summary is not the
+    # primary model's, and the next run with the primary back rebuilds it
+    models = "+".join(dict.fromkeys(a.model for a in answers))
+    tools = MCP_TOOLS if answers[-1].used_tools else None
+    entry = cache_entry_for(encoded, models, instructions, tools, chunking)
+
+    try:
+        os.makedirs(AISUMMARY_DIR, exist_ok=True)
+        final_markdown = f"{format_title(parsed_date)}{content or ''}"
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(final_markdown)
+    except Exception as e:
+        raise SummaryError(f"Error writing output file: {e}", 6)
+
+    entry["generated"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return SummaryResult(
+        date=date_str,
+        status="generated",
+        output_path=output_path,
+        elapsed=time.perf_counter() - t0,
+        reason=reason,
+        cache_entry=entry,
+    )
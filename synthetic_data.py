@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Azure retail price records at a configurable scale.
+
+The records are modeled on the existing monthly/full/*.ndjson files. They
+follow the same field set, the same spread of records across
+effectiveStartDate values (and the share that fall on the 1st of a month),
+the same region/location mix, and the same meter naming patterns. Templates
+are real records; a share of generated records become new meter variants
+("<skuName> v<n>") with their own price. Variants repeat across regions
+the way real meters do, so the partial files keep a realistic unique-record
+ratio (roughly twice today's at --scale 1, growing with the scale).
+
+Output is NDJSON in meter-download.py's format, so it can stand in for
+prices.ndjson anywhere in the pipeline.
+
+Usage:
+  python synthetic_data.py --scale 10 --output /tmp/prices-10x.ndjson
+  python synthetic_data.py --records 500000 --dates 400 --seed 7 --output big.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import json
+import math
+import random
+import sys
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator
+
+BASE_DIR = Path(__file__).resolve().parent
+SOURCE_DIR = BASE_DIR / "monthly" / "full"
+# Share of generated records that become a new meter variant instead of a re-priced copy
+VARIANT_RATE = 0.3
+# Share of records that move to another region rather than keeping the template's
+REGION_SHUFFLE_RATE = 0.4
+
+
+@dataclass
+class Profile:
+    """What the generator samples from, read from the real monthly/full files."""
+
+    date_weights: dict[str, int]  # YYYY-MM-DD -> record count
+    templates: dict[str, list[dict]]  # YYYY-MM-DD -> records effective that day
+    regions: Counter  # (armRegionName, location) -> record count
+
+    @property
+    def total(self) -> int:
+        return sum(self.date_weights.values())
+
+    @property
+    def first_of_month_share(self) -> float:
+        firsts = sum(1 for d in self.date_weights if d.endswith("-01"))
+        return firsts / len(self.date_weights) if self.date_weights else 0.0
+
+
+def load_profile(source_dir: Path = SOURCE_DIR) -> Profile:
+    date_weights: dict[str, int] = {}
+    templates: dict[str, list[dict]] = defaultdict(list)
+    regions: Counter = Counter()
+    for path in sorted(source_dir.glob("*.ndjson")):
+        if path.stem == "unknown":
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                templates[path.stem].append(record)
+                regions[(record.get("armRegionName", ""), record.get("location", ""))] += 1
+        date_weights[path.stem] = len(templates[path.stem])
+    if not date_weights:
+        raise SystemExit(f"No .ndjson files to model in {source_dir}")
+    return Profile(date_weights, dict(templates), regions)
+
+
+def _shift_months(d: date, months: int) -> date:
+    month_index = d.year * 12 + d.month - 1 + months
+    year, month = divmod(month_index, 12)
+    return date(year, month + 1, min(d.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def synthetic_dates(profile: Profile, count: int, rng: random.Random) -> dict[str, str]:
+    """Pick `count` dates and map each to the real date whose records it borrows.
+
+    Real dates are used first (the most populated ones when count is smaller).
+    Extra dates fall in random months across the real timeline, extended past
+    the latest real date as more are needed, and land on the 1st about as
+    often as the real ones do. Each borrows the templates and weight of a
+    randomly chosen real date.
+    """
+    real = sorted(profile.date_weights, key=profile.date_weights.get, reverse=True)
+    chosen: dict[str, str] = {d: d for d in real[:count]}
+    first = date.fromisoformat(min(real)).replace(day=1)
+    last = date.fromisoformat(max(real))
+    span = (last.year - first.year) * 12 + last.month - first.month + 1 + count // 12
+    while len(chosen) < count:
+        month = _shift_months(first, rng.randrange(span))
+        day = month if rng.random() < profile.first_of_month_share else month + timedelta(days=rng.randrange(1, 28))
+        chosen.setdefault(day.isoformat(), rng.choice(real))
+    return chosen
+
+
+def _variant(record: dict, n: int) -> dict:
+    """Turn a template into a new meter of the same family, e.g. 'GPT 5 Glbl' -> 'GPT 5 Glbl v3'."""
+    sku = record.get("skuName") or record.get("meterName", "")
+    new_sku = f"{sku} v{n}"
+    meter = record.get("meterName", "")
+    new_meter = meter.replace(sku, new_sku, 1) if sku and sku in meter else f"{meter} v{n}"
+    out = dict(record, skuName=new_sku, meterName=new_meter)
+    if "armSkuName" in out:
+        out["armSkuName"] = new_sku
+    return out
+
+
+def generate(profile: Profile, records: int, *, dates: int | None = None, seed: int = 0) -> Iterator[dict]:
+    """Yield `records` synthetic price records spread over `dates` effective dates."""
+    rng = random.Random(seed)
+    date_map = synthetic_dates(profile, dates or len(profile.date_weights), rng)
+    day_names = list(date_map)
+    weights = [profile.date_weights[date_map[d]] for d in day_names]
+    region_pairs = list(profile.regions)
+    region_weights = list(profile.regions.values())
+    # Each meter family gets about one new variant per multiple of today's size,
+    # priced once, so the same variant repeats across regions like real meters do
+    variant_count = max(1, math.ceil(records / profile.total))
+    variant_prices: dict[tuple, float] = {}
+
+    for _ in range(records):
+        day = rng.choices(day_names, weights)[0]
+        template = rng.choice(profile.templates[date_map[day]])
+        record = dict(template)
+        if rng.random() < VARIANT_RATE:
+            n = rng.randrange(2, variant_count + 2)
+            record = _variant(record, n)
+            key = (record.get("productName"), record.get("meterName"), record.get("unitPrice"))
+            if key not in variant_prices:
+                price = template.get("unitPrice") or 0.0
+                variant_prices[key] = float(f"{price * rng.lognormvariate(0, 0.2):.6g}") if price else 0.0
+            record["unitPrice"] = record["retailPrice"] = variant_prices[key]
+            record["skuId"] = f"{record.get('productId', 'SYNTH')}/V{n:03d}"
+        if rng.random() < REGION_SHUFFLE_RATE:
+            region, location = rng.choices(region_pairs, region_weights)[0]
+            record["armRegionName"] = region
+            record["location"] = location
+        record["meterId"] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        record["effectiveStartDate"] = f"{day}T00:00:00Z"
+        yield record
+
+
+def default_dates(profile: Profile, records: int) -> int:
+    """Date count for `records` records: grows with the square root of the scale."""
+    return max(1, round(len(profile.date_weights) * math.sqrt(records / profile.total)))
+
+
+def write_ndjson(path: Path, records: Iterator[dict]) -> tuple[int, int]:
+    """Stream records to path in meter-download.py's format; return (records, bytes)."""
+    count = 0
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+            f.write(line)
+            count += 1
+            size += len(line.encode("utf-8"))
+    return count, size
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Generate synthetic Azure price records modeled on monthly/full.")
+    size = p.add_mutually_exclusive_group()
+    size.add_argument("--scale", type=float, default=1.0, help="Multiple of today's record count (default 1)")
+    size.add_argument("--records", type=int, help="Exact number of records to generate")
+    p.add_argument(
+        "--dates",
+        type=int,
+        help="Number of distinct effectiveStartDate values (default: today's count x sqrt(scale), so both the number and the size of the date files grow)",
+    )
+    p.add_argument("--seed", type=int, default=0, help="Random seed (default 0); the same seed gives the same file")
+    p.add_argument("--source", default=str(SOURCE_DIR), help="Directory of real NDJSON files to model (default monthly/full)")
+    p.add_argument("--output", default="synthetic-prices.ndjson", help="Output NDJSON path (default synthetic-prices.ndjson)")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    profile = load_profile(Path(args.source))
+    records = args.records if args.records is not None else round(profile.total * args.scale)
+    dates = args.dates or default_dates(profile, records)
+    count, size = write_ndjson(Path(args.output), generate(profile, records, dates=dates, seed=args.seed))
+    print(f"Wrote {count:,} records over {dates} dates ({size / 1e6:.1f} MB) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
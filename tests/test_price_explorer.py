@@ -0,0 +1,199 @@
+"""The explorer's filters must give the same rows in the browser, price_query.py and price_server.py."""
+
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import price_query  # noqa: E402
+import price_server  # noqa: E402
+
+NUMBERS = [
+    0.0, 1.0, 100.0, 0.5, 2e-05, 2.5e-05, 1e-06, 1e-07, 1.5e-07, 354.83871, 1234567.891,
+    1e20, 1e21, 1.5e21, -2e-05, -0.0, 5e-324, 1.7976931348623157e308, 0.1 + 0.2,
+]
+
+
+def record(i: int, date: str, **fields) -> dict:
+    return {
+        "productName": f"Product {i % 3}",
+        "meterName": ["GPT 5 Batch Inpt", "gpt-5 output", "Éclair tokens", "Standard"][i % 4],
+        "unitPrice": NUMBERS[i % len(NUMBERS)],
+        "retailPrice": NUMBERS[(i * 7) % len(NUMBERS)],
+        "armRegionName": ["eastus", "westus", "EastUS2", "Global"][i % 4],
+        "tierMinimumUnits": float(i % 2),
+        "isPrimaryMeterRegion": i % 3 == 0,
+        "effectiveStartDate": f"{date}T00:00:00Z",
+        "meterId": f"m{i:03d}",
+        **({"skuName": ["Standard 10", "standard 9", "Ünit", "unit", "S1", "s01", "Spot"][i % 7]} if i % 5 else {}),
+        **fields,
+    }
+
+
+RECORDS = [record(i, ["2024-01-01", "2025-06-01", "2025-06-15"][i % 3]) for i in range(120)]
+
+QUERIES = [
+    [("f_unitPrice", "equals:0.00002")],
+    [("f_unitPrice", "equals:2e-05")],
+    [("f_unitPrice", "contains:0.0000")],
+    [("f_unitPrice", "equals:1e-7")],
+    [("f_unitPrice", "equals:100")],
+    [("f_unitPrice", "startswith:1e+")],
+    [("f_retailPrice", "endswith:05")],
+    [("s_unitPrice", "0.00002,354.83871")],
+    [("s_tierMinimumUnits", "0")],
+    [("s_isPrimaryMeterRegion", "false")],
+    [("f_isPrimaryMeterRegion", "equals:true")],
+    [("f_meterName", "contains:batch"), ("s_armRegionName", "eastus,westus")],
+    [("f_meterName", "equals:éclair tokens")],
+    [("f_armRegionName", "notequal:eastus"), ("f_effectiveStartDate", "startswith:2025-06")],
+    # Not applyOp operators: the browser filters nothing for these
+    [("f_unitPrice", "lt:0.001")],
+    [("f_meterName", "in:x")],
+    [("f_meterName", "gt:a"), ("f_unitPrice", "equals:0.00002")],
+]
+# Operators index.html's applyOp does not know
+IGNORED = [[("f_unitPrice", "lt:0.001")], [("f_meterName", "in:x")], [("f_unitPrice", "bogus:1")]]
+
+
+SORTS = ["effectiveStartDate", "unitPrice", "retailPrice", "meterName", "armRegionName", "skuName", "isPrimaryMeterRegion", "tierMinimumUnits"]
+INDEX_HTML = Path(__file__).resolve().parent.parent / "index.html"
+
+
+def run_node(script: str, data) -> object | None:
+    """Run a node script with `data` as JSON on stdin; its JSON output, or None without node."""
+    node = shutil.which("node")
+    if node is None:
+        return None
+    out = subprocess.run([node, "-e", script], input=json.dumps(data), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def explorer_functions() -> str:
+    """index.html's sort functions, from textRuns() through applySort() and getDistinctValues()."""
+    html = INDEX_HTML.read_text(encoding="utf-8")
+    sorting = re.search(r"\t\tfunction textRuns\(.*?(?=\t\tfunction updateCounts\()", html, re.S).group(0)
+    distinct = re.search(r"\t\tfunction getDistinctValues\(.*?\n\t\t}\n", html, re.S).group(0)
+    return sorting + distinct
+
+
+def node_strings(values: list) -> list[str] | None:
+    """String(v) for each value, as the browser computes it; None without node."""
+    return run_node("const v = JSON.parse(require('fs').readFileSync(0, 'utf8')); process.stdout.write(JSON.stringify(v.map(String)));", values)
+
+
+class NumberTextTest(unittest.TestCase):
+    def test_known_spellings(self):
+        cases = {2e-05: "0.00002", 1e-07: "1e-7", 1e21: "1e+21", 100.0: "100", -0.0: "0", 354.83871: "354.83871", 1.5e-07: "1.5e-7"}
+        for value, text in cases.items():
+            self.assertEqual(price_query.as_text(value), text)
+        self.assertEqual(price_query.as_text(3), "3")
+        self.assertEqual(price_query.as_text(True), "true")
+
+    def test_matches_javascript(self):
+        expected = node_strings(NUMBERS)
+        if expected is None:
+            self.skipTest("node is not installed")
+        self.assertEqual([price_query.as_text(v) for v in NUMBERS], expected)
+
+
+class FilterParityTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        # The same records as one file (the CLI's default) and as date files (monthly/full)
+        self.file = self.tmp / "prices.ndjson"
+        self.file.write_text("".join(json.dumps(r) + "\n" for r in RECORDS), encoding="utf-8")
+        self.directory = self.tmp / "full"
+        self.directory.mkdir()
+        for date in sorted({r["effectiveStartDate"][:10] for r in RECORDS}):
+            with open(self.directory / f"{date}.ndjson", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r) + "\n" for r in RECORDS if r["effectiveStartDate"].startswith(date))
+
+    def cli_count(self, source: Path, predicates: list) -> int:
+        files = price_query.source_files(source, predicates)
+        return sum(1 for _ in price_query.iter_records(files, predicates))
+
+    def test_same_rows_in_both_paths(self):
+        for source in (self.file, self.directory):
+            store = price_server.PriceStore(source)
+            store.refresh()
+            for query in QUERIES:
+                with self.subTest(source=source.name, query=query):
+                    predicates = price_server.parse_query(query)[0]
+                    expected = sum(1 for r in RECORDS if all(p.matches(r) for p in predicates))
+                    self.assertEqual(self.cli_count(source, predicates), expected)
+                    self.assertEqual(store.query(query + [("pageSize", "1000")])["total"], expected)
+
+    def test_unknown_operators_filter_nothing(self):
+        store = price_server.PriceStore(self.file)
+        store.refresh()
+        for query in IGNORED:
+            with self.subTest(query=query):
+                self.assertEqual(price_server.parse_query(query)[0], [])
+                self.assertEqual(store.query(query)["total"], len(RECORDS))
+
+    def test_number_filters_use_javascript_text(self):
+        store = price_server.PriceStore(self.file)
+        store.refresh()
+        exponent = sum(1 for r in RECORDS if r["unitPrice"] == 2e-05)
+        self.assertGreater(exponent, 0)
+        self.assertEqual(store.query([("f_unitPrice", "equals:0.00002")])["total"], exponent)
+        self.assertEqual(store.query([("f_unitPrice", "equals:2e-05")])["total"], 0)
+        self.assertIn("0.00002", store.distinct("unitPrice")[0])
+        self.assertNotIn("2e-05", store.distinct("unitPrice")[0])
+
+
+class SortParityTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.file = self.tmp / "prices.ndjson"
+        self.file.write_text("".join(json.dumps(r) + "\n" for r in RECORDS), encoding="utf-8")
+        self.store = price_server.PriceStore(self.file)
+        self.store.refresh()
+
+    def server_order(self, column: str, direction: str) -> list[str]:
+        result = self.store.query([("sort", f"{column}:{direction}"), ("pageSize", "1000")])
+        return [r["meterId"] for r in result["rows"]]
+
+    def test_cli_and_server_agree(self):
+        for column in SORTS:
+            for direction in ("asc", "desc"):
+                with self.subTest(column=column, direction=direction):
+                    rows = price_query.order_rows(price_query.iter_records([self.file], []), column, direction == "desc", None)
+                    self.assertEqual([r["meterId"] for r in rows], self.server_order(column, direction))
+                    top = price_query.order_rows(price_query.iter_records([self.file], []), column, direction == "desc", 7)
+                    self.assertEqual([r["meterId"] for r in top], self.server_order(column, direction)[:7])
+
+    def test_server_pages_match_the_browser(self):
+        script = explorer_functions() + """
+            const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+            const data = input.records, server = { enabled: false }, state = { filteredRows: [] }, out = { orders: {}, distinct: {} };
+            for (const key of input.sorts) {
+                for (const dir of ['asc', 'desc']) {
+                    state.sort = { key, dir }; state.filteredRows = data.slice(); applySort();
+                    out.orders[key + ':' + dir] = state.filteredRows.map(r => r.meterId);
+                }
+                out.distinct[key] = getDistinctValues(key);
+            }
+            process.stdout.write(JSON.stringify(out));
+        """
+        browser = run_node(script, {"records": RECORDS, "sorts": SORTS})
+        if browser is None:
+            self.skipTest("node is not installed")
+        for column in SORTS:
+            with self.subTest(column=column):
+                for direction in ("asc", "desc"):
+                    self.assertEqual(self.server_order(column, direction), browser["orders"][f"{column}:{direction}"])
+                self.assertEqual(self.store.distinct(column)[0], browser["distinct"][column])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""price_query.py's command line: projection, sorting and output formats."""
+
+import csv
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "price_query.py"
+PRICES = [0.5, 975000.0, 2e-05, 354.83871, 12.0, 780000.0, 0.0]
+RECORDS = [{"meterName": f"meter {i}", "unitPrice": price, "armRegionName": "eastus"} for i, price in enumerate(PRICES)]
+TOP3 = ["meter 1", "meter 5", "meter 3"]
+
+
+class SortOutsideSelectTest(unittest.TestCase):
+    def setUp(self):
+        tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmp)
+        self.source = tmp / "prices.ndjson"
+        self.source.write_text("".join(json.dumps(r) + "\n" for r in RECORDS), encoding="utf-8")
+
+    def query(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(SCRIPT), "--source", str(self.source), *args], capture_output=True, text=True
+        )
+
+    def test_sort_key_not_selected(self):
+        args = ("--select", "meterName", "--sort", "unitPrice:desc", "--limit", "3")
+        for fmt in ("table", "csv", "json", "ndjson"):
+            with self.subTest(format=fmt):
+                result = self.query(*args, "--format", fmt)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                if fmt == "json":
+                    rows = json.loads(result.stdout)
+                elif fmt == "ndjson":
+                    rows = [json.loads(line) for line in result.stdout.splitlines()]
+                elif fmt == "csv":
+                    rows = list(csv.DictReader(io.StringIO(result.stdout)))
+                else:
+                    lines = result.stdout.splitlines()
+                    self.assertEqual(lines[0].strip(), "meterName")
+                    rows = [{"meterName": line.strip()} for line in lines[1:]]
+                # The most expensive meters, with only the selected column
+                self.assertEqual(rows, [{"meterName": name} for name in TOP3])
+
+    def test_exact_values(self):
+        result = self.query("--select", "unitPrice", "--sort", "unitPrice", "--limit", "3")
+        self.assertEqual(result.stdout.split()[1:], ["0", "0.00002", "0.5"])
+
+    def test_grouped_sort_must_be_a_column(self):
+        result = self.query("--group-by", "armRegionName", "--sort", "unitPrice")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--sort takes one of", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()